@@ -113,6 +113,39 @@ class QuantumBenchmark:
             'throughput': throughput
         }
     
+    def benchmark_scoring_kernel(self, count=50000):
+        """Benchmark kernel vettoriale degli score oggettivi"""
+        print("🧮 Benchmarking vectorized scoring kernel...")
+        
+        try:
+            import numpy as np
+            from quantum_analyzer import CATEGORY_AVERAGE_PRICES, compute_objective_scores
+        except ImportError:
+            print("   ⚠️ numpy/quantum_analyzer not available, skipping scoring kernel benchmark")
+            return
+        
+        ratings = np.random.uniform(3.5, 5.0, count).round(1)
+        review_counts = np.random.randint(50, 5000, count)
+        prices = np.random.uniform(29.99, 299.99, count).round(2)
+        avg_prices = np.random.choice(list(CATEGORY_AVERAGE_PRICES.values()), count)
+        
+        times = []
+        for i in range(10):
+            start_time = time.perf_counter()
+            compute_objective_scores(ratings, review_counts, prices, avg_prices)
+            times.append(time.perf_counter() - start_time)
+        
+        avg_time = statistics.mean(times)
+        throughput = count / avg_time
+        
+        print(f"   🧮 Scoring kernel: {avg_time * 1000:.1f}ms for {count} products ({throughput:,.0f} products/sec)")
+        
+        self.results['scoring_kernel'] = {
+            'products': count,
+            'average': avg_time,
+            'throughput': throughput
+        }
+    
     def mock_quantum_calculation(self):
         """Mock quantum score calculation"""
         # Simula calcoli complessi
@@ -157,6 +190,59 @@ class QuantumBenchmark:
         except ImportError:
             print("   ⚠️ psutil not available, skipping memory benchmark")
     
+    def benchmark_product_memory(self, count=100000):
+        """Benchmark memoria per prodotto: dataclass classica vs __slots__ vs ProductBatch"""
+        print("📦 Benchmarking product memory footprint...")
+        
+        try:
+            import tracemalloc
+            from dataclasses import fields, make_dataclass
+            from quantum_analyzer import Product, ProductBatch
+        except ImportError:
+            print("   ⚠️ quantum_analyzer not available, skipping product memory benchmark")
+            return
+        
+        # Rappresentazione precedente: @dataclass senza __slots__
+        LegacyProduct = make_dataclass('LegacyProduct', [(f.name, f.type, f) for f in fields(Product)])
+        categories = ['tech', 'home', 'fitness', 'kitchen']
+        
+        def build(product_cls):
+            return [
+                product_cls(
+                    asin=f"B{str(i).zfill(9)}",
+                    title=f"Prodotto {categories[i % 4]} {i}",
+                    price=29.99 + (i % 270),
+                    rating=3.5 + (i % 16) / 10,
+                    review_count=50 + i % 4950,
+                    category=categories[i % 4],
+                    description=f"Descrizione dettagliata prodotto {i}",
+                    features=[f"Feature {j}" for j in range(3)]
+                )
+                for i in range(count)
+            ]
+        
+        def measure(factory):
+            tracemalloc.start()
+            data = factory()
+            size = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            del data
+            return size / count
+        
+        results = {
+            'dataclass': measure(lambda: build(LegacyProduct)),
+            'slots': measure(lambda: build(Product)),
+            'batch': measure(lambda: ProductBatch.from_products(build(Product)))
+        }
+        
+        for name, bytes_per_product in results.items():
+            print(f"   📦 {name}: {bytes_per_product:.0f} bytes/product")
+        
+        self.results['product_memory'] = {
+            'products': count,
+            **{f'{name}_bytes_per_product': value for name, value in results.items()}
+        }
+    
     def benchmark_file_operations(self):
         """Benchmark operazioni file"""
         print("📁 Benchmarking file operations...")
@@ -197,6 +283,133 @@ class QuantumBenchmark:
             'samples': 100
         }
     
+    def benchmark_json_backends(self, repeats=5):
+        """Benchmark load/dump JSON: stdlib vs backend di quantum_io sui file reali"""
+        print("🗂️ Benchmarking JSON backends on assets/data...")
+        
+        try:
+            import glob
+            import quantum_io
+        except ImportError:
+            print("   ⚠️ quantum_io not available, skipping JSON benchmark")
+            return
+        
+        def best_time(func):
+            times = []
+            for i in range(repeats):
+                start_time = time.perf_counter()
+                func()
+                times.append(time.perf_counter() - start_time)
+            return min(times)
+        
+        json_results = {'backend': quantum_io.JSON_BACKEND}
+        for path in sorted(glob.glob('assets/data/*.json')):
+            with open(path, 'rb') as f:
+                raw = f.read()
+            data = json.loads(raw)
+            
+            timings = {
+                'stdlib_load': best_time(lambda: json.loads(raw)),
+                'fast_load': best_time(lambda: quantum_io.loads(raw)),
+                'stdlib_dump': best_time(lambda: json.dumps(data, indent=2, ensure_ascii=False)),
+                'fast_dump': best_time(lambda: quantum_io.dumps(data, ensure_ascii=False))
+            }
+            
+            name = path.split('/')[-1]
+            print(f"   🗂️ {name} ({len(raw) / 1024:.0f}KB): "
+                  f"load {timings['stdlib_load'] * 1000:.2f}ms → {timings['fast_load'] * 1000:.2f}ms, "
+                  f"dump {timings['stdlib_dump'] * 1000:.2f}ms → {timings['fast_dump'] * 1000:.2f}ms")
+            json_results[name] = timings
+        
+        print(f"   ⚙️ Backend: {quantum_io.JSON_BACKEND}")
+        self.results['json_backends'] = json_results
+    
+    def benchmark_subscriber_streaming(self, count=1000000):
+        """Benchmark picco RSS: subscribers.json caricato intero vs letto in streaming"""
+        print(f"📬 Benchmarking subscriber streaming ({count} subscribers)...")
+        
+        try:
+            import os
+            import sys
+            from generate_mock_data import MockDataGenerator
+            from quantum_io import atomic_write_json_array
+        except ImportError:
+            print("   ⚠️ generate_mock_data/quantum_io not available, skipping subscriber benchmark")
+            return
+        
+        path = 'temp/benchmark_subscribers.json'
+        atomic_write_json_array(path, MockDataGenerator().iter_subscribers(count), compact=True)
+        
+        # Ogni modalità in un processo separato: ru_maxrss è il picco dell'intero processo
+        readers = {
+            'full_load': "subscribers = json.load(open(path)); active = sum(1 for s in subscribers if s.get('status') == 'active')",
+            'streaming': "active = sum(1 for s in iter_json_array(path) if s.get('status') == 'active')"
+        }
+        scripts_dir = os.path.dirname(os.path.abspath(__file__))
+        
+        streaming_results = {'subscribers': count, 'file_mb': os.path.getsize(path) / 1024 / 1024}
+        for name, reader in readers.items():
+            code = (
+                "import json, resource, sys, time\n"
+                f"sys.path.insert(0, {scripts_dir!r})\n"
+                "from quantum_io import iter_json_array\n"
+                f"path = {path!r}\n"
+                "start = time.perf_counter()\n"
+                f"{reader}\n"
+                "print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, time.perf_counter() - start, active)"
+            )
+            output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+            peak_mb, elapsed, active = output.stdout.split()
+            
+            print(f"   📬 {name}: peak RSS {float(peak_mb):.0f}MB, {float(elapsed):.1f}s ({active} active)")
+            streaming_results[name] = {'peak_rss_mb': float(peak_mb), 'time': float(elapsed)}
+        
+        os.remove(path)
+        self.results['subscriber_streaming'] = streaming_results
+    
+    def benchmark_email_serialization(self, recipients=10000):
+        """Benchmark messaggi/secondo: MIME costruito per destinatario vs skeleton renderizzato una volta"""
+        print(f"✉️ Benchmarking email serialization ({recipients} recipients)...")
+        
+        try:
+            from email.mime.multipart import MIMEMultipart
+            from email.mime.text import MIMEText
+            from email_automation import EmailAutomation, UNSUBSCRIBE_URL_PLACEHOLDER
+            from email_skeleton import MessageSkeleton
+        except ImportError:
+            print("   ⚠️ email_automation not available, skipping email benchmark")
+            return
+        
+        automation = EmailAutomation()
+        subject = "🧬 QuantumChoices Weekly: Top 5 Prodotti Scientificamente Testati"
+        content = "<div class='product'><h3>Prodotto di test</h3><p>Quantum Score: 9.1/10</p></div>" * 5
+        body = automation.render_campaign_body(subject, content)
+        emails = [f"user{i}@example.com" for i in range(recipients)]
+        
+        def per_recipient_mime():
+            for email in emails:
+                msg = MIMEMultipart('alternative')
+                msg['Subject'] = subject
+                msg['From'] = 'newsletter@quantumchoices.com'
+                msg['To'] = email
+                msg.attach(MIMEText(automation.personalize_body(body, email), 'html'))
+                msg.as_bytes()
+        
+        def skeleton_render():
+            skeleton = MessageSkeleton(subject, 'newsletter@quantumchoices.com', body, [UNSUBSCRIBE_URL_PLACEHOLDER])
+            for email in emails:
+                skeleton.render(email, {UNSUBSCRIBE_URL_PLACEHOLDER: automation.unsubscribe_url(email)})
+        
+        serialization_results = {'recipients': recipients}
+        for name, func in [('per_recipient_mime', per_recipient_mime), ('skeleton', skeleton_render)]:
+            start_time = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start_time
+            serialization_results[name] = {'time': elapsed, 'messages_per_second': recipients / elapsed}
+            print(f"   ✉️ {name}: {recipients / elapsed:.0f} msg/s ({elapsed:.2f}s)")
+        
+        self.results['email_serialization'] = serialization_results
+    
     def run_lighthouse_benchmark(self):
         """Esegue benchmark Lighthouse"""
         print("🚨 Running Lighthouse benchmark...")
@@ -241,8 +454,13 @@ class QuantumBenchmark:
             ("Page Load Performance", self.benchmark_page_load()),
             ("API Endpoints", self.benchmark_api_endpoints()),
             ("AI Processing", self.benchmark_ai_processing),
+            ("Scoring Kernel", self.benchmark_scoring_kernel),
             ("Memory Usage", self.benchmark_memory_usage),
+            ("Product Memory", self.benchmark_product_memory),
             ("File Operations", self.benchmark_file_operations),
+            ("JSON Backends", self.benchmark_json_backends),
+            ("Subscriber Streaming", self.benchmark_subscriber_streaming),
+            ("Email Serialization", self.benchmark_email_serialization),
             ("Lighthouse Audit", self.run_lighthouse_benchmark)
         ]
         
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+QuantumChoices - Campaign Journal
+Registro persistente (SQLite) dell'esito per destinatario: una campagna interrotta
+riprende solo dai destinatari ancora da servire
+"""
+
+import os
+import sqlite3
+import time
+from typing import Dict, Iterable, Iterator, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Esiti definitivi: il destinatario non va più contattato per la campagna
+FINAL_STATUSES = ('sent', 'failed')
+
+class CampaignJournal:
+    def __init__(self, path: str = 'assets/data/campaign_journal.db', flush_every: int = 100):
+        self.path = path
+        self.flush_every = flush_every
+        self._pending_rows = []
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._db = sqlite3.connect(path)
+        self._db.executescript("""
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS campaigns (
+                id TEXT PRIMARY KEY,
+                subject TEXT,
+                started_at REAL NOT NULL,
+                completed_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS deliveries (
+                campaign_id TEXT NOT NULL,
+                email TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 1,
+                error TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (campaign_id, email)
+            ) WITHOUT ROWID;
+        """)
+
+    def start(self, campaign_id: str, subject: str = None) -> bool:
+        """Registra la campagna; False se era già completata"""
+        with self._db:
+            self._db.execute(
+                "INSERT OR IGNORE INTO campaigns (id, subject, started_at) VALUES (?, ?, ?)",
+                (campaign_id, subject, time.time())
+            )
+        (completed_at,) = self._db.execute(
+            "SELECT completed_at FROM campaigns WHERE id = ?", (campaign_id,)
+        ).fetchone()
+        return completed_at is None
+
+    def completed_recipients(self, campaign_id: str) -> set:
+        """Destinatari con esito definitivo (inviati o rifiutati in modo permanente)"""
+        cursor = self._db.execute(
+            f"SELECT email FROM deliveries WHERE campaign_id = ? "
+            f"AND status IN ({', '.join('?' * len(FINAL_STATUSES))})",
+            (campaign_id, *FINAL_STATUSES)
+        )
+        return {email for (email,) in cursor}
+
+    def pending(self, campaign_id: str, subscribers: Iterable[Dict]) -> Iterator[Dict]:
+        """Filtra i subscribers già serviti in un'esecuzione precedente"""
+        done = self.completed_recipients(campaign_id)
+        if done:
+            logger.info(f"♻️ Resuming campaign {campaign_id}: {len(done)} recipients already completed")
+        for subscriber in subscribers:
+            if subscriber['email'] not in done:
+                yield subscriber
+
+    def record(self, campaign_id: str, email: str, status: str, error: Optional[BaseException] = None):
+        """Registra l'esito di un destinatario (scritto su disco a blocchi di flush_every)"""
+        self._pending_rows.append((campaign_id, email, status, str(error) if error else None, time.time()))
+        if len(self._pending_rows) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """Rende persistenti gli esiti in attesa"""
+        if not self._pending_rows:
+            return
+        with self._db:
+            self._db.executemany("""
+                INSERT INTO deliveries (campaign_id, email, status, error, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (campaign_id, email) DO UPDATE SET
+                    status = excluded.status,
+                    attempts = attempts + 1,
+                    error = excluded.error,
+                    updated_at = excluded.updated_at
+            """, self._pending_rows)
+        self._pending_rows = []
+
+    def finish(self, campaign_id: str):
+        """Chiude la campagna se non restano destinatari rinviati"""
+        self.flush()
+        (deferred,) = self._db.execute(
+            "SELECT COUNT(*) FROM deliveries WHERE campaign_id = ? AND status = 'deferred'", (campaign_id,)
+        ).fetchone()
+        if deferred == 0:
+            with self._db:
+                self._db.execute("UPDATE campaigns SET completed_at = ? WHERE id = ?", (time.time(), campaign_id))
+
+    def get_stats(self, campaign_id: str) -> Dict[str, int]:
+        """Conteggio destinatari per esito"""
+        self.flush()
+        cursor = self._db.execute(
+            "SELECT status, COUNT(*) FROM deliveries WHERE campaign_id = ? GROUP BY status", (campaign_id,)
+        )
+        return dict(cursor.fetchall())
+
+    def close(self):
+        self.flush()
+        self._db.close()
@@ -5,15 +5,34 @@ Gestione automatica campagne email
 """
 
 import smtplib
-import json
 import os
+import asyncio
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime, timedelta
-import schedule
-import time
 import logging
-from jinja2 import Template
+import numpy as np
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, TemplateNotFound
+
+from campaign_journal import CampaignJournal
+from email_delivery import SESSION_ERRORS, AsyncDeliveryEngine
+from email_skeleton import MessageSkeleton
+from price_history import PriceHistory, product_key
+from quantum_scheduler import QuantumScheduler, daily, monthly, weekly
+from quantum_io import iter_json_array, iter_jsonl, load_json
+from quantum_ranking import TopKRanker
+from smtp_pool import SMTPConnectionPool, TokenBucket
+from subscriber_store import SubscriberStore
+
+# Periodo di una campagna newsletter per frequenza: un rilancio nello stesso periodo riprende dal journal
+NEWSLETTER_PERIODS = {
+    'daily': ('Daily', '%Y-%m-%d'),
+    'weekly': ('Weekly', '%G-W%V'),
+    'monthly': ('Monthly', '%Y-%m')
+}
+
+# Segnaposto per i campi per-destinatario nel corpo renderizzato una volta per campagna
+UNSUBSCRIBE_URL_PLACEHOLDER = '@@QC_UNSUBSCRIBE_URL@@'
 
 class EmailAutomation:
     def __init__(self):
@@ -21,6 +40,27 @@ class EmailAutomation:
         self.smtp_port = int(os.getenv('SMTP_PORT', 587))
         self.email_user = os.getenv('EMAIL_USER')
         self.email_password = os.getenv('EMAIL_PASSWORD')
+        self.subscriber_db_path = os.getenv('SUBSCRIBER_DB', 'assets/data/subscribers.db')
+        self.campaign_journal_path = os.getenv('CAMPAIGN_JOURNAL_DB', 'assets/data/campaign_journal.db')
+        self.price_history_dir = os.getenv('PRICE_HISTORY_DIR', 'assets/data/price_history')
+        self.price_drop_threshold = float(os.getenv('PRICE_DROP_THRESHOLD', 5))
+        # Invii massivi: sessioni SMTP riutilizzate e rate limit in messaggi/secondo
+        self.smtp_starttls = os.getenv('SMTP_STARTTLS', 'true').lower() != 'false'
+        self.email_concurrency = int(os.getenv('EMAIL_CONCURRENCY', 4))
+        self.smtp_pool_size = int(os.getenv('SMTP_POOL_SIZE', self.email_concurrency))
+        self.send_rate = float(os.getenv('EMAIL_RATE_PER_SECOND', 10))
+        # Invii pianificati distribuiti su una finestra (secondi) per non saturare l'SMTP
+        self.send_window = float(os.getenv('EMAIL_SEND_WINDOW', 3600))
+        
+        # Template compilati una volta per processo (ricompilati se cambia mtime) + bytecode cache su disco
+        template_cache_dir = 'assets/cache/jinja'
+        os.makedirs(template_cache_dir, exist_ok=True)
+        self.template_env = Environment(
+            loader=FileSystemLoader('email_templates'),
+            auto_reload=True,
+            bytecode_cache=FileSystemBytecodeCache(template_cache_dir)
+        )
+        self._default_template = None
         
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
@@ -28,19 +68,86 @@ class EmailAutomation:
     def load_subscribers(self):
         """Carica lista subscribers"""
         try:
-            with open('assets/data/subscribers.json', 'r') as f:
-                return json.load(f)
+            return load_json('assets/data/subscribers.json')
         except FileNotFoundError:
             return []
 
+    def iter_subscribers(self, status='active', **filters):
+        """Subscribers filtrati: store SQLite indicizzato se importato, altrimenti subscribers.json"""
+        if os.path.exists(self.subscriber_db_path):
+            store = SubscriberStore(self.subscriber_db_path)
+            try:
+                yield from store.iter_subscribers(status=status, **filters)
+            finally:
+                store.close()
+            return
+
+        # Fallback: lettura streaming (JSONL se presente), un subscriber alla volta
+        if os.path.exists('assets/data/subscribers.jsonl'):
+            subscribers = iter_jsonl('assets/data/subscribers.jsonl')
+        elif os.path.exists('assets/data/subscribers.json'):
+            subscribers = iter_json_array('assets/data/subscribers.json')
+        else:
+            return
+
+        frequency = filters.get('frequency')
+        segments = set(filters.get('segments') or ())
+        categories = set(filters.get('categories') or ())
+        for subscriber in subscribers:
+            preferences = subscriber.get('preferences', {})
+            if status is not None and subscriber.get('status') != status:
+                continue
+            if frequency is not None and preferences.get('frequency') != frequency:
+                continue
+            if segments and segments.isdisjoint(subscriber.get('segments', [])):
+                continue
+            if categories and categories.isdisjoint(preferences.get('categories', [])):
+                continue
+            yield subscriber
+
+    def count_subscribers(self, status='active', **filters):
+        """Numero di subscribers filtrati (via indice SQLite se disponibile)"""
+        if os.path.exists(self.subscriber_db_path):
+            store = SubscriberStore(self.subscriber_db_path)
+            try:
+                return store.count(status=status, **filters)
+            finally:
+                store.close()
+        return sum(1 for _ in self.iter_subscribers(status=status, **filters))
+
+    def import_subscribers(self):
+        """Import one-shot di subscribers.json nello store SQLite"""
+        store = SubscriberStore(self.subscriber_db_path)
+        try:
+            count = store.import_json('assets/data/subscribers.json')
+        finally:
+            store.close()
+        self.logger.info(f"📥 {count} subscribers importati in {self.subscriber_db_path}")
+
     def load_template(self, template_name):
-        """Carica template email"""
-        template_path = f'email_templates/{template_name}.html'
+        """Carica template email (dalla cache dell'Environment)"""
         try:
-            with open(template_path, 'r') as f:
-                return Template(f.read())
-        except FileNotFoundError:
-            return Template(self.get_default_template())
+            return self.template_env.get_template(f'{template_name}.html')
+        except TemplateNotFound:
+            if self._default_template is None:
+                self._default_template = self.template_env.from_string(self.get_default_template())
+            return self._default_template
+
+    def render_campaign_body(self, subject, content, template_name='newsletter'):
+        """Renderizza il corpo comune a tutti i destinatari, con segnaposto per i campi personali"""
+        return self.load_template(template_name).render(
+            subject=subject,
+            content=content,
+            unsubscribe_url=UNSUBSCRIBE_URL_PLACEHOLDER
+        )
+
+    def unsubscribe_url(self, to_email):
+        """Link di disiscrizione del destinatario"""
+        return f"https://quantumchoices.com/unsubscribe?email={to_email}"
+
+    def personalize_body(self, body, to_email):
+        """Sostituisce i campi per-destinatario nel corpo pre-renderizzato"""
+        return body.replace(UNSUBSCRIBE_URL_PLACEHOLDER, self.unsubscribe_url(to_email))
 
     def get_default_template(self):
         """Template email di default"""
@@ -76,71 +183,235 @@ class EmailAutomation:
         </html>
         """
 
-    def send_email(self, to_email, subject, content, template_name='newsletter'):
-        """Invia singola email"""
+    def create_smtp_pool(self):
+        """Pool di sessioni SMTP autenticate per invii massivi"""
+        return SMTPConnectionPool(
+            self.smtp_server,
+            self.smtp_port,
+            user=self.email_user,
+            password=self.email_password,
+            size=self.smtp_pool_size,
+            starttls=self.smtp_starttls
+        )
+
+    def send_email(self, to_email, subject, content, template_name='newsletter', pool=None):
+        """Invia singola email (su una sessione del pool, se fornito)"""
         try:
-            template = self.load_template(template_name)
-            html_content = template.render(
-                subject=subject,
-                content=content,
-                unsubscribe_url=f"https://quantumchoices.com/unsubscribe?email={to_email}"
-            )
+            self.deliver_email(to_email, subject, content, template_name, pool)
+            self.logger.info(f"Email sent successfully to {to_email}")
+            return True
 
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = subject
-            msg['From'] = self.email_user
-            msg['To'] = to_email
+        except Exception as e:
+            self.logger.error(f"Failed to send email to {to_email}: {e}")
+            return False
+
+    def deliver_email(self, to_email, subject, content, template_name='newsletter', pool=None, body=None):
+        """Costruisce e invia l'email; solleva eccezione in caso di errore"""
+        if body is None:
+            body = self.render_campaign_body(subject, content, template_name)
+        html_content = self.personalize_body(body, to_email)
 
-            html_part = MIMEText(html_content, 'html')
-            msg.attach(html_part)
+        msg = MIMEMultipart('alternative')
+        msg['Subject'] = subject
+        msg['From'] = self.email_user
+        msg['To'] = to_email
 
+        html_part = MIMEText(html_content, 'html')
+        msg.attach(html_part)
+
+        if pool is not None:
+            pool.send_message(msg)
+        else:
             with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.email_user, self.email_password)
+                if self.smtp_starttls:
+                    server.starttls()
+                if self.email_user and self.email_password:
+                    server.login(self.email_user, self.email_password)
                 server.send_message(msg)
 
-            self.logger.info(f"Email sent successfully to {to_email}")
-            return True
+    def deliver_rendered(self, to_email, skeleton, pool):
+        """Invia tramite lo skeleton MIME della campagna: patch dei soli campi personali"""
+        if not to_email.isascii():
+            # Indirizzi internazionalizzati (SMTPUTF8): percorso MIME completo
+            return self.deliver_email(to_email, skeleton.subject, None, pool=pool, body=skeleton.html_body)
+        message = skeleton.render(to_email, {UNSUBSCRIBE_URL_PLACEHOLDER: self.unsubscribe_url(to_email)})
+        pool.sendmail(self.email_user or '', [to_email], message)
 
-        except Exception as e:
-            self.logger.error(f"Failed to send email to {to_email}: {e}")
-            return False
+    def send_newsletter(self, segments=None, personalized=True, frequency=None, send_window=None):
+        """Invia newsletter (top prodotti delle categorie preferite di ogni subscriber)
 
-    def send_newsletter(self):
-        """Invia newsletter settimanale"""
-        self.logger.info("📧 Sending weekly newsletter...")
+        Con frequency solo ai subscribers con quella preferenza (daily/weekly/monthly);
+        con send_window l'invio è distribuito su quella finestra in secondi.
+        """
+        label, period = NEWSLETTER_PERIODS.get(frequency, NEWSLETTER_PERIODS['weekly'])
+        self.logger.info(f"📧 Sending {label.lower()} newsletter...")
         
         # Carica dati prodotti
         try:
-            with open('assets/data/quantum_data.json', 'r') as f:
-                quantum_data = json.load(f)
+            quantum_data = load_json('assets/data/quantum_data.json')
         except FileNotFoundError:
             self.logger.error("Quantum data not found")
             return
 
         # Seleziona top products
-        top_products = []
+        ranker = TopKRanker(5)
         for category in quantum_data['categories'].values():
-            top_products.extend(category['top_products'][:2])
-
-        top_products.sort(key=lambda x: x['quantum_score'], reverse=True)
-        top_products = top_products[:5]
+            ranker.extend(category['top_products'][:2])
+        top_products = ranker.ranked()
 
         # Genera contenuto newsletter
         content = self.generate_newsletter_content(top_products)
-        subject = f"🧬 QuantumChoices Weekly: Top 5 Prodotti Scientificamente Testati"
+        subject = f"🧬 QuantumChoices {label}: Top 5 Prodotti Scientificamente Testati"
+
+        if personalized:
+            # Indice precalcolato una volta: top 5 per categoria
+            top_by_category = {}
+            for name, category in quantum_data['categories'].items():
+                category_ranker = TopKRanker(5)
+                category_ranker.extend(category['top_products'])
+                top_by_category[name] = category_ranker.ranked()
+
+            def category_signature(subscriber):
+                categories = subscriber.get('preferences', {}).get('categories', [])
+                return tuple(sorted(set(categories).intersection(top_by_category)))
+
+            def signature_content(signature):
+                if not signature:
+                    return content  # nessuna categoria nota: top 5 globale
+                signature_ranker = TopKRanker(5)
+                seen = set()
+                for category in signature:
+                    for product in top_by_category[category]:
+                        if product['asin'] not in seen:
+                            seen.add(product['asin'])
+                            signature_ranker.push(product['quantum_score'], product['asin'], product)
+                return self.generate_newsletter_content(signature_ranker.ranked())
+
+            content = self.variant_renderer(category_signature, signature_content)
+
+        # Una campagna per periodo (settimana ISO di default) e per pubblico: un rilancio riprende
+        # dai destinatari mancanti, un invio a segmenti diversi è una campagna distinta
+        audience = f"segments:{'+'.join(sorted(set(segments)))}" if segments else None
+        campaign_id = '-'.join(filter(None, ['newsletter', frequency, audience, datetime.now().strftime(period)]))
+
+        expected_recipients = None
+        if send_window:
+            expected_recipients = self.count_subscribers(status='active', segments=segments, frequency=frequency)
+
+        # Invia a tutti i subscribers attivi (invio concorrente)
+        report = asyncio.run(self.deliver_campaign(
+            self.iter_subscribers(status='active', segments=segments, frequency=frequency), subject, content,
+            campaign_id=campaign_id, send_window=send_window, expected_recipients=expected_recipients
+        ))
+        if report is None:
+            return None
+
+        self.logger.info(f"Newsletter sent to {report['sent']} subscribers")
+        return report
+
+    def campaign_rate(self, send_window=None, expected_recipients=None):
+        """Messaggi/secondo: invii grandi distribuiti sulla finestra, mai oltre EMAIL_RATE_PER_SECOND"""
+        if not send_window or not expected_recipients:
+            return self.send_rate
+        # Almeno 1 msg/s: le campagne piccole partono subito invece di diluirsi sulla finestra
+        rate = min(self.send_rate, max(1.0, expected_recipients / send_window))
+        self.logger.info(
+            f"🕰️ Spreading {expected_recipients} emails over {send_window / 60:.0f} min at {rate:.2f} msg/s"
+        )
+        return rate
+
+    @staticmethod
+    def variant_renderer(signature_for, content_for):
+        """Funzione subscriber -> (firma, contenuto) per deliver_campaign: contenuto generato una volta per firma"""
+        contents = {}
 
-        # Invia a tutti i subscribers
-        subscribers = self.load_subscribers()
-        sent_count = 0
+        def variant(subscriber):
+            signature = signature_for(subscriber)
+            content = contents.get(signature)
+            if content is None:
+                content = contents.setdefault(signature, content_for(signature))
+            return signature, content
+
+        return variant
+
+    async def deliver_campaign(self, subscribers, subject, content, template_name='newsletter', campaign_id=None,
+                               send_window=None, expected_recipients=None):
+        """Consegna concorrente: email_concurrency sessioni SMTP, coda limitata, retry con backoff
+
+        content è il contenuto comune, oppure una funzione subscriber -> (chiave, contenuto):
+        ogni variante viene renderizzata e serializzata una sola volta per chiave.
+        Con campaign_id gli esiti finiscono nel journal: i destinatari già serviti
+        vengono saltati e i rinviati (errori temporanei) ritentati al rilancio.
+        Un errore di sessione SMTP (login, mittente) interrompe l'invio e restituisce None.
+        Con send_window ed expected_recipients il rate scende fino a coprire la finestra.
+        """
+        journal = None
+        on_result = None
+        if campaign_id is not None:
+            journal = CampaignJournal(self.campaign_journal_path)
+            if not journal.start(campaign_id, subject):
+                self.logger.info(f"Campaign {campaign_id} already completed, nothing to send")
+                journal.close()
+                return None
+            subscribers = journal.pending(campaign_id, subscribers)
+            on_result = lambda subscriber, status, error: journal.record(campaign_id, subscriber['email'], status, error)
+
+        # Corpo renderizzato e messaggio MIME serializzato una sola volta per campagna (o per variante)
+        skeletons = {}
+
+        def skeleton_for(variant, variant_content):
+            skeleton = skeletons.get(variant)
+            if skeleton is None:
+                body = self.render_campaign_body(subject, variant_content, template_name)
+                skeleton = skeletons.setdefault(
+                    variant, MessageSkeleton(subject, self.email_user or '', body, [UNSUBSCRIBE_URL_PLACEHOLDER])
+                )
+            return skeleton
+
+        if callable(content):
+            variant_for = content
+        else:
+            skeleton_for(None, content)
+            variant_for = lambda subscriber: (None, content)
+
+        def send(subscriber):
+            skeleton = skeleton_for(*variant_for(subscriber))
+            self.deliver_rendered(subscriber['email'], skeleton, pool)
         
-        for subscriber in subscribers:
-            if subscriber.get('status') == 'active':
-                if self.send_email(subscriber['email'], subject, content):
-                    sent_count += 1
-                time.sleep(1)  # Rate limiting
+        try:
+            with self.create_smtp_pool() as pool:
+                engine = AsyncDeliveryEngine(
+                    send,
+                    concurrency=self.email_concurrency,
+                    queue_size=self.email_concurrency * 25,
+                    rate_limiter=TokenBucket(self.campaign_rate(send_window, expected_recipients))
+                )
+                report = await engine.run(subscribers, label=lambda subscriber: subscriber['email'], on_result=on_result)
+                self.logger.info(f"SMTP pool stats: {pool.stats}")
+            if journal is not None:
+                journal.finish(campaign_id)
+                self.logger.info(f"🗒️ Campaign {campaign_id} journal: {journal.get_stats(campaign_id)}")
+        except SESSION_ERRORS as e:
+            # Credenziali/mittente/server rifiutati: nessun destinatario segnato come fallito,
+            # la campagna resta aperta e riprende al prossimo rilancio
+            self.logger.error(f"❌ Campaign {campaign_id or subject!r} aborted by SMTP session error: {e}")
+            return None
+        finally:
+            if journal is not None:
+                journal.close()
+
+        report['variants'] = len(skeletons)
+        if callable(content):
+            self.logger.info(f"🧩 {report['variants']} content variants rendered for {report['total']} recipients")
 
-        self.logger.info(f"Newsletter sent to {sent_count} subscribers")
+        latency = report['latency']
+        self.logger.info(
+            f"📬 Delivery report: {report['sent']} sent, {report['deferred']} deferred, "
+            f"{report['failed']} failed in {report['duration']:.1f}s "
+            f"(p50 {latency['p50'] * 1000:.0f}ms, p90 {latency['p90'] * 1000:.0f}ms, "
+            f"p99 {latency['p99'] * 1000:.0f}ms, max {latency['max'] * 1000:.0f}ms)"
+        )
+        return report
 
     def generate_newsletter_content(self, products):
         """Genera contenuto newsletter"""
@@ -171,26 +442,117 @@ class EmailAutomation:
         return content
 
     def send_price_alerts(self):
-        """Invia alert prezzi"""
+        """Invia alert prezzi: ribassi rispetto allo storico, solo ai subscribers delle categorie interessate"""
         self.logger.info("💰 Checking for price drops...")
-        
-        # Logic per price drops (da implementare)
-        # Confronta prezzi attuali con precedenti
-        pass
+
+        try:
+            quantum_data = load_json('assets/data/quantum_data.json')
+        except FileNotFoundError:
+            self.logger.error("Quantum data not found")
+            return
+
+        products = [
+            product
+            for category in quantum_data['categories'].values()
+            for product in category['top_products']
+            if product.get('price') is not None
+        ]
+        prices = np.fromiter((product['price'] for product in products), dtype=np.float32, count=len(products))
+
+        # Diff vettoriale dello snapshot contro lo storico (idempotente sullo stesso last_update);
+        # chiave (categoria, ASIN): lo stesso ASIN in due categorie non si confronta col prezzo dell'altra
+        history = PriceHistory(self.price_history_dir)
+        drops = history.update(
+            [product_key(product['category'], product['asin']) for product in products], prices,
+            snapshot=quantum_data.get('last_update', ''), min_drop_pct=self.price_drop_threshold
+        )
+
+        # Ribassi indicizzati per categoria, i più forti per primi
+        drops_by_category = {}
+        for index, previous_price, drop_pct in sorted(
+            zip(drops['index'], drops['previous_price'], drops['drop_pct']), key=lambda drop: -drop[2]
+        ):
+            product = products[index]
+            drops_by_category.setdefault(product['category'], []).append({
+                **product,
+                'previous_price': round(float(previous_price), 2),
+                'drop_pct': round(float(drop_pct))
+            })
+
+        if not drops_by_category:
+            self.logger.info("No price drops detected")
+            return None
+
+        self.logger.info(
+            f"📉 {len(drops['index'])} price drops in {len(drops_by_category)} categories: "
+            f"{', '.join(sorted(drops_by_category))}"
+        )
+
+        # Join tramite indice categorie: solo i subscribers con almeno una categoria in ribasso
+        subscribers = self.iter_subscribers(status='active', categories=sorted(drops_by_category))
+
+        # Contenuto generato una volta per combinazione di categorie
+        alert_variant = self.variant_renderer(
+            lambda subscriber: tuple(sorted(
+                set(subscriber.get('preferences', {}).get('categories', [])).intersection(drops_by_category)
+            )),
+            lambda categories: self.generate_price_alert_content(
+                [drop for category in categories for drop in drops_by_category[category][:5]]
+            )
+        )
+
+        subject = "💰 QuantumChoices: Prezzi in calo nelle tue categorie"
+        report = asyncio.run(self.deliver_campaign(
+            subscribers, subject, alert_variant,
+            campaign_id=f"price-alerts-{quantum_data.get('last_update', datetime.now().date().isoformat())}"
+        ))
+        if report is None:
+            return None
+
+        self.logger.info(f"Price alerts sent to {report['sent']} subscribers")
+        return report
+
+    def generate_price_alert_content(self, drops):
+        """Genera contenuto alert prezzi"""
+        content = """
+        <h2>📉 Prezzi in calo</h2>
+        <p>Alcuni prodotti delle tue categorie preferite costano meno di ieri:</p>
+        """
+
+        for drop in drops:
+            content += f"""
+            <div class="product">
+                <h3>{drop['title']}</h3>
+                <p><strong>Prezzo:</strong> <s>€{drop['previous_price']}</s> €{drop['price']} (-{drop['drop_pct']}%)</p>
+                <p><strong>Quantum Score:</strong> <span class="score">{drop['quantum_score']}/10</span></p>
+                <p><a href="https://amazon.it/dp/{drop['asin']}?tag=quantumchoic-21" 
+                      style="background: #3498db; color: white; padding: 0.5rem 1rem; text-decoration: none; border-radius: 4px;">
+                   🛒 Vedi su Amazon
+                </a></p>
+            </div>
+            """
+
+        return content
 
     def schedule_campaigns(self):
         """Pianifica campagne automatiche"""
-        # Newsletter ogni lunedì alle 09:00
-        schedule.every().monday.at("09:00").do(self.send_newsletter)
+        scheduler = QuantumScheduler()
+        
+        # Newsletter per frequenza scelta dal subscriber, alle 09:00 (settimanale il lunedì, mensile il 1°)
+        for frequency, next_due in [('daily', daily('09:00')), ('weekly', weekly(0, '09:00')), ('monthly', monthly(1, '09:00'))]:
+            scheduler.add_job(
+                f'newsletter-{frequency}',
+                lambda frequency=frequency: self.send_newsletter(frequency=frequency, send_window=self.send_window),
+                next_due
+            )
         
         # Price alerts ogni giorno alle 08:00
-        schedule.every().day.at("08:00").do(self.send_price_alerts)
+        scheduler.add_job('price-alerts', self.send_price_alerts, daily('08:00'))
         
         self.logger.info("📅 Email campaigns scheduled")
         
-        while True:
-            schedule.run_pending()
-            time.sleep(60)
+        # Nessun polling: il loop dorme fino alla prossima scadenza
+        scheduler.run_forever()
 
 def main():
     """Main function"""
@@ -199,11 +561,16 @@ def main():
     if len(os.sys.argv) > 1:
         command = os.sys.argv[1]
         if command == "newsletter":
-            automation.send_newsletter()
+            # Segmenti opzionali: python email_automation.py newsletter price_sensitive ...
+            automation.send_newsletter(segments=os.sys.argv[2:] or None)
+        elif command == "price-alerts":
+            automation.send_price_alerts()
         elif command == "schedule":
             automation.schedule_campaigns()
+        elif command == "import-subscribers":
+            automation.import_subscribers()
     else:
-        print("Usage: python email_automation.py [newsletter|schedule]")
+        print("Usage: python email_automation.py [newsletter [segment...]|price-alerts|schedule|import-subscribers]")
 
 if __name__ == "__main__":
     main()
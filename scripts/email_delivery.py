@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+QuantumChoices - Async Email Delivery Engine
+Invio concorrente con coda limitata (backpressure), retry con backoff e report finale
+"""
+
+import asyncio
+import random
+import smtplib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import logging
+
+from smtp_pool import TokenBucket, is_connection_error
+
+logger = logging.getLogger(__name__)
+
+def is_transient_error(error: BaseException) -> bool:
+    """Errori temporanei (rete o codici SMTP 4xx): il destinatario va ritentato"""
+    if is_connection_error(error):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    return False
+
+# Errori dell'intera sessione SMTP (login, mittente, connessione): non dipendono dal destinatario
+SESSION_ERRORS = (
+    smtplib.SMTPAuthenticationError,
+    smtplib.SMTPSenderRefused,
+    smtplib.SMTPConnectError,
+    smtplib.SMTPHeloError,
+    smtplib.SMTPNotSupportedError,
+)
+
+def is_session_error(error: BaseException) -> bool:
+    """Errori di sessione permanenti: l'invio va interrotto, non è un rifiuto del destinatario"""
+    return isinstance(error, SESSION_ERRORS) and not is_transient_error(error)
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Percentile (nearest-rank) di una lista già ordinata"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(q / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+class AsyncDeliveryEngine:
+    def __init__(self, send_func: Callable[[Any], None], concurrency: int = 4, queue_size: int = 100,
+                 max_retries: int = 3, base_delay: float = 1.0, rate_limiter: Optional[TokenBucket] = None):
+        # send_func è bloccante (smtplib): eseguita in un thread pool di `concurrency` worker
+        self.send_func = send_func
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.rate_limiter = rate_limiter
+
+    async def run(self, jobs: Iterable[Any], label: Callable[[Any], str] = str,
+                  on_result: Optional[Callable[[Any, str, Optional[BaseException]], None]] = None) -> Dict:
+        """Consegna tutti i job e restituisce il report (sent, deferred, failed, latenze)
+
+        on_result(job, status, error) viene chiamata con l'esito finale di ogni job.
+        Un errore di sessione permanente (vedi is_session_error) interrompe l'invio e viene rilanciato.
+        """
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='email-delivery')
+
+        counts = {'sent': 0, 'deferred': 0, 'failed': 0, 'retries': 0}
+        latencies = []
+        start_time = time.perf_counter()
+
+        def finish(job, status, error=None):
+            counts[status] += 1
+            if on_result is not None:
+                on_result(job, status, error)
+
+        async def deliver(job):
+            for attempt in range(self.max_retries + 1):
+                if self.rate_limiter is not None:
+                    delay = self.rate_limiter.wait_time()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+
+                send_start = time.perf_counter()
+                try:
+                    await loop.run_in_executor(executor, self.send_func, job)
+                except Exception as e:
+                    if is_session_error(e):
+                        # Nessun esito per il job: l'errore risale a run() e il resto della coda non viene servito
+                        logger.error(f"Delivery aborted at {label(job)}, SMTP session error: {e}")
+                        raise
+                    if not is_transient_error(e):
+                        logger.error(f"Delivery failed for {label(job)}: {e}")
+                        finish(job, 'failed', e)
+                        return
+                    if attempt == self.max_retries:
+                        logger.warning(f"Delivery deferred for {label(job)} after {attempt + 1} attempts: {e}")
+                        finish(job, 'deferred', e)
+                        return
+                    counts['retries'] += 1
+                    # Backoff esponenziale con jitter
+                    await asyncio.sleep(self.base_delay * 2 ** attempt * random.uniform(0.5, 1.5))
+                else:
+                    # Fuori dal try: un errore di on_result non va scambiato per un errore di invio
+                    latencies.append(time.perf_counter() - send_start)
+                    finish(job, 'sent')
+                    return
+
+        async def worker():
+            while True:
+                job = await queue.get()
+                try:
+                    if job is None:
+                        return
+                    await deliver(job)
+                finally:
+                    queue.task_done()
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+
+        def raise_worker_error():
+            for task in workers:
+                if task.done() and not task.cancelled() and task.exception() is not None:
+                    raise task.exception()
+
+        async def put(job):
+            # A coda piena attende anche i worker: se ne muore uno l'errore risale al producer
+            # invece di restare bloccati per sempre su una coda che nessuno svuota
+            raise_worker_error()
+            if not queue.full():
+                queue.put_nowait(job)
+                return
+            putter = asyncio.ensure_future(queue.put(job))
+            try:
+                while not putter.done():
+                    running = [task for task in workers if not task.done()]
+                    await asyncio.wait([putter, *running], return_when=asyncio.FIRST_COMPLETED)
+                    raise_worker_error()
+            finally:
+                if not putter.done():
+                    putter.cancel()
+
+        try:
+            # Producer: la put si blocca a coda piena, i job vengono letti solo quando c'è spazio
+            for job in jobs:
+                await put(job)
+            for _ in workers:
+                await put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+            executor.shutdown(wait=True)
+
+        duration = time.perf_counter() - start_time
+        latencies.sort()
+        total = counts['sent'] + counts['deferred'] + counts['failed']
+
+        return {
+            **counts,
+            'total': total,
+            'duration': duration,
+            'throughput': counts['sent'] / duration if duration > 0 else 0.0,
+            'latency': {
+                'p50': percentile(latencies, 50),
+                'p90': percentile(latencies, 90),
+                'p99': percentile(latencies, 99),
+                'max': latencies[-1] if latencies else 0.0
+            }
+        }
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+QuantumChoices - MIME Skeleton
+Messaggio serializzato una volta per campagna; per ogni destinatario si
+sostituiscono solo i byte dei campi personali (To, link di disiscrizione, ...)
+"""
+
+import io
+import quopri
+from email.charset import QP, Charset
+from email.generator import BytesGenerator
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Dict, List
+
+TO_MARKER = b'@@QC_TO@@'
+BODY_MARKER = '@@QC_BODY@@'
+
+# Soft line break quoted-printable: si decodifica in "niente", unisce segmenti codificati separatamente
+SOFT_BREAK = b'=\r\n'
+
+def qp_encode(text: str) -> bytes:
+    """Quoted-printable UTF-8 con terminatori CRLF"""
+    return quopri.encodestring(text.encode('utf-8')).replace(b'\n', b'\r\n')
+
+class MessageSkeleton:
+    def __init__(self, subject: str, from_addr: str, html_body: str, placeholders: List[str]):
+        self.subject = subject
+        self.from_addr = from_addr
+        self.html_body = html_body
+        self.placeholders = list(placeholders)
+
+        # Header e struttura MIME serializzati una sola volta
+        charset = Charset('utf-8')
+        charset.body_encoding = QP
+        msg = MIMEMultipart('alternative')
+        msg['Subject'] = subject
+        msg['From'] = from_addr
+        msg['To'] = TO_MARKER.decode('ascii')
+        msg.attach(MIMEText(BODY_MARKER, 'html', charset))
+
+        buffer = io.BytesIO()
+        BytesGenerator(buffer, policy=msg.policy.clone(linesep='\r\n')).flatten(msg)
+        head, tail = buffer.getvalue().split(BODY_MARKER.encode('ascii'))
+        head_before_to, head_after_to = head.split(TO_MARKER)
+
+        # Corpo HTML codificato una volta, spezzato attorno ai segnaposto:
+        # [statico, campo, statico, campo, ..., statico]
+        self._segments = []
+        self._fields = []
+        remaining = html_body
+        while True:
+            position, placeholder = min(
+                ((remaining.find(p), p) for p in self.placeholders if p in remaining),
+                default=(-1, None)
+            )
+            if placeholder is None:
+                break
+            self._segments.append(qp_encode(remaining[:position]))
+            self._fields.append(placeholder)
+            remaining = remaining[position + len(placeholder):]
+        self._segments.append(qp_encode(remaining))
+
+        self._head_before_to = head_before_to
+        self._head_after_to = head_after_to
+        self._tail = tail
+
+    def render(self, to_email: str, fields: Dict[str, str]) -> bytes:
+        """Messaggio completo per un destinatario (indirizzo ASCII)"""
+        parts = [self._head_before_to, to_email.encode('ascii'), self._head_after_to]
+        for segment, placeholder in zip(self._segments, self._fields):
+            parts.append(segment)
+            parts.append(SOFT_BREAK)
+            parts.append(qp_encode(fields[placeholder]))
+            parts.append(SOFT_BREAK)
+        parts.append(self._segments[-1])
+        parts.append(self._tail)
+        return b''.join(parts)
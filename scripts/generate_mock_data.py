@@ -4,12 +4,13 @@ QuantumChoices - Mock Data Generator
 Genera dati di esempio per test e demo
 """
 
-import json
 import random
 import uuid
 from datetime import datetime, timedelta
 import os
 
+from quantum_io import atomic_write_json
+
 class MockDataGenerator:
     def __init__(self):
         self.categories = ['tech', 'home', 'fitness', 'kitchen', 'fashion', 'gaming']
@@ -180,8 +181,10 @@ class MockDataGenerator:
     
     def generate_subscribers(self, count=1000):
         """Genera subscribers email"""
-        subscribers = []
-        
+        return list(self.iter_subscribers(count))
+    
+    def iter_subscribers(self, count=1000):
+        """Genera subscribers email uno alla volta (per dataset grandi)"""
         for i in range(count):
             signup_date = datetime.now() - timedelta(days=random.randint(1, 365))
             last_activity = signup_date + timedelta(days=random.randint(0, 30))
@@ -204,9 +207,7 @@ class MockDataGenerator:
                 'total_conversions': random.randint(0, 10)
             }
             
-            subscribers.append(subscriber)
-        
-        return subscribers
+            yield subscriber
     
     def save_all_mock_data(self):
         """Salva tutti i dati mock"""
@@ -238,18 +239,15 @@ class MockDataGenerator:
                 }
             }
         
-        with open('assets/data/quantum_data.json', 'w') as f:
-            json.dump(quantum_data, f, indent=2, ensure_ascii=False)
+        atomic_write_json('assets/data/quantum_data.json', quantum_data, compact=True, ensure_ascii=False)
         
         # Salva analytics
         analytics = self.generate_analytics_data()
-        with open('assets/data/analytics_data.json', 'w') as f:
-            json.dump(analytics, f, indent=2, ensure_ascii=False)
+        atomic_write_json('assets/data/analytics_data.json', analytics, ensure_ascii=False)
         
         # Salva subscribers
         subscribers = self.generate_subscribers(1200)
-        with open('assets/data/subscribers.json', 'w') as f:
-            json.dump([s.__dict__ if hasattr(s, '__dict__') else s for s in subscribers], f, indent=2, ensure_ascii=False)
+        atomic_write_json('assets/data/subscribers.json', [s.__dict__ if hasattr(s, '__dict__') else s for s in subscribers], ensure_ascii=False)
         
         # Salva health report
         health_report = {
@@ -265,8 +263,7 @@ class MockDataGenerator:
             }
         }
         
-        with open('assets/data/health_report.json', 'w') as f:
-            json.dump(health_report, f, indent=2)
+        atomic_write_json('assets/data/health_report.json', health_report)
         
         # Genera content suggestions
         content_suggestions = {
@@ -294,8 +291,7 @@ class MockDataGenerator:
             'generated_at': datetime.now().isoformat()
         }
         
-        with open('assets/data/content_suggestions.json', 'w') as f:
-            json.dump(content_suggestions, f, indent=2, ensure_ascii=False)
+        atomic_write_json('assets/data/content_suggestions.json', content_suggestions, ensure_ascii=False)
         
         print("✅ Mock data generated successfully!")
         print(f"📊 Products: {len(products)}")
@@ -6,17 +6,21 @@ Monitoraggio continuo delle performance
 
 import asyncio
 import aiohttp
-import json
 import time
-import psutil
 import logging
-from datetime import datetime, timedelta
+from collections import deque
+from datetime import datetime
 import smtplib
 from email.mime.text import MIMEText
 import os
 import requests
 from dataclasses import dataclass
-from typing import Dict, List
+from typing import Any, Dict, List, Optional
+
+from latency_histogram import LatencyHistogram
+from metrics_store import MetricsStore
+from quantum_io import atomic_write_json, atomic_write_text, loads
+from resource_sampler import ResourceSampler
 
 @dataclass
 class HealthMetric:
@@ -30,36 +34,118 @@ class QuantumHealthMonitor:
     def __init__(self):
         self.base_url = os.getenv('MONITOR_URL', 'https://quantumchoices.github.io')
         self.alert_email = os.getenv('ALERT_EMAIL', 'admin@quantumchoices.com')
-        self.metrics_history = []
+        # Storico metriche: serie temporali append-only con rollup 1m/1h/1d
+        self.metrics_store = MetricsStore(os.getenv('METRICS_DIR', 'assets/data/metrics'))
+        self.latest_report = None
+        
+        # Latenze per endpoint: un istogramma per ciclo (+ richieste fallite), finestra mobile unita via merge
+        self.latency_histograms = {}
+        self.latency_window_cycles = int(os.getenv('LATENCY_WINDOW_CYCLES', 12))
+        # Campioni minimi nella finestra perché il p99 possa generare alert
+        self.latency_min_samples = int(os.getenv('LATENCY_MIN_SAMPLES', 10))
         self.alert_thresholds = {
             'response_time': 3.0,  # seconds
             'error_rate': 0.05,    # 5%
             'cpu_usage': 80.0,     # %
             'memory_usage': 85.0,  # %
-            'availability': 99.0   # %
+            'availability': 99.0,  # %
+            'response_time_p99': 5.0  # seconds, per endpoint
         }
         
+        # Probe concorrenti su una sessione condivisa: deadline per probe (secondi)
+        self.probe_timeout = float(os.getenv('PROBE_TIMEOUT', 10))
+        self._session = None
+        
+        # GET condizionali: ultimo JSON parsato per URL con ETag/Last-Modified
+        self._conditional_cache = {}
+        self._conditional_locks = {}
+        self.conditional_stats = {'requests': 0, 'not_modified': 0, 'bytes_downloaded': 0, 'bytes_saved': 0}
+        
+        # Risorse di sistema campionate in background su una finestra mobile (avviato da start())
+        self.resource_sampler = ResourceSampler(
+            interval=float(os.getenv('RESOURCE_SAMPLE_INTERVAL', 5)),
+            window=float(os.getenv('RESOURCE_WINDOW', 300))
+        )
+        
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
 
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Sessione HTTP condivisa da tutti i probe: keep-alive e cache DNS"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=20, ttl_dns_cache=300, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.probe_timeout)
+            )
+        return self._session
+
+    def start(self):
+        """Avvia il campionamento delle risorse in background (non blocca il loop)"""
+        self.resource_sampler.start()
+
+    async def close(self):
+        """Chiude la sessione condivisa e ferma il campionamento"""
+        self.resource_sampler.stop()
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def fetch_json(self, url: str) -> Optional[Any]:
+        """JSON di un URL via GET condizionale: riscarica e riparsa solo se il file è cambiato
+
+        Restituisce None se la risposta non è 200 (o 304 con risultato in cache).
+        """
+        # Un solo fetch per URL alla volta: i probe concorrenti riusano il risultato appena scaricato
+        lock = self._conditional_locks.setdefault(url, asyncio.Lock())
+        async with lock:
+            cached = self._conditional_cache.get(url)
+            headers = {}
+            if cached is not None:
+                if cached['etag']:
+                    headers['If-None-Match'] = cached['etag']
+                if cached['last_modified']:
+                    headers['If-Modified-Since'] = cached['last_modified']
+            
+            session = await self.get_session()
+            async with session.get(url, headers=headers) as response:
+                self.conditional_stats['requests'] += 1
+                if response.status == 304 and cached is not None:
+                    self.conditional_stats['not_modified'] += 1
+                    self.conditional_stats['bytes_saved'] += cached['size']
+                    return cached['data']
+                if response.status != 200:
+                    return None
+                
+                body = await response.read()
+                self.conditional_stats['bytes_downloaded'] += len(body)
+                data = loads(body)
+                
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
+                if etag or last_modified:
+                    self._conditional_cache[url] = {
+                        'etag': etag,
+                        'last_modified': last_modified,
+                        'size': len(body),
+                        'data': data
+                    }
+                return data
+
     async def check_website_availability(self) -> HealthMetric:
         """Check availability del sito"""
         try:
-            start_time = time.time()
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(self.base_url, timeout=10) as response:
-                    response_time = time.time() - start_time
-                    
-                    status = 'healthy' if response.status == 200 else 'unhealthy'
-                    
-                    return HealthMetric(
-                        name='availability',
-                        value=100.0 if response.status == 200 else 0.0,
-                        threshold=self.alert_thresholds['availability'],
-                        status=status,
-                        timestamp=datetime.now()
-                    )
+            session = await self.get_session()
+            async with session.get(self.base_url, timeout=aiohttp.ClientTimeout(total=10)) as response:
+                status = 'healthy' if response.status == 200 else 'unhealthy'
+                
+                return HealthMetric(
+                    name='availability',
+                    value=100.0 if response.status == 200 else 0.0,
+                    threshold=self.alert_thresholds['availability'],
+                    status=status,
+                    timestamp=datetime.now()
+                )
                     
         except Exception as e:
             self.logger.error(f"Availability check failed: {e}")
@@ -79,21 +165,34 @@ class QuantumHealthMonitor:
             '/manifest.json'
         ]
         
-        response_times = []
+        session = await self.get_session()
         
-        for endpoint in endpoints:
+        async def measure(endpoint):
             try:
-                start_time = time.time()
+                start_time = time.perf_counter()
                 
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(f"{self.base_url}{endpoint}", timeout=5) as response:
-                        response_time = time.time() - start_time
-                        response_times.append(response_time)
+                async with session.get(f"{self.base_url}{endpoint}", timeout=aiohttp.ClientTimeout(total=5)) as response:
+                    await response.read()
+                    return time.perf_counter() - start_time
                         
             except Exception as e:
                 self.logger.warning(f"Response time check failed for {endpoint}: {e}")
-                response_times.append(10.0)  # Penalty for failed requests
+                return None
+        
+        # Endpoint misurati in parallelo sulla stessa sessione
+        measured = await asyncio.gather(*(measure(endpoint) for endpoint in endpoints))
         
+        # Negli istogrammi solo latenze reali: le richieste fallite sono contate a parte
+        for endpoint, response_time in zip(endpoints, measured):
+            cycle_histogram = LatencyHistogram()
+            if response_time is not None:
+                cycle_histogram.record(response_time)
+            self.add_latency_snapshot(endpoint, cycle_histogram, failures=int(response_time is None))
+        
+        response_times = [
+            10.0 if response_time is None else response_time  # Penalty for failed requests
+            for response_time in measured
+        ]
         avg_response_time = sum(response_times) / len(response_times)
         status = 'healthy' if avg_response_time < self.alert_thresholds['response_time'] else 'warning'
         
@@ -112,20 +211,17 @@ class QuantumHealthMonitor:
             '/assets/data/content_suggestions.json'
         ]
         
-        healthy_endpoints = 0
-        
-        for endpoint in api_endpoints:
+        async def probe(endpoint) -> bool:
             try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(f"{self.base_url}{endpoint}") as response:
-                        if response.status == 200:
-                            # Validate JSON
-                            data = await response.json()
-                            if data:  # Non-empty response
-                                healthy_endpoints += 1
+                # Validate JSON (riparsato solo se cambiato)
+                data = await self.fetch_json(f"{self.base_url}{endpoint}")
+                return bool(data)  # Non-empty response
                                 
             except Exception as e:
                 self.logger.warning(f"API health check failed for {endpoint}: {e}")
+            return False
+        
+        healthy_endpoints = sum(await asyncio.gather(*(probe(endpoint) for endpoint in api_endpoints)))
         
         health_percentage = (healthy_endpoints / len(api_endpoints)) * 100
         status = 'healthy' if health_percentage >= 90 else 'warning'
@@ -139,11 +235,18 @@ class QuantumHealthMonitor:
         )
 
     def check_system_resources(self) -> List[HealthMetric]:
-        """Check risorse sistema"""
+        """Check risorse sistema: medie sulla finestra del sampler, senza bloccare il loop"""
         metrics = []
         
-        # CPU Usage
-        cpu_percent = psutil.cpu_percent(interval=1)
+        resources = self.resource_sampler.aggregate()
+        if resources is None:
+            # Nessun campione ancora (sampler appena avviato): metriche di sistema sconosciute in questo ciclo,
+            # un campione immediato darebbe una CPU senza significato
+            self.logger.info("⏳ System resources not sampled yet, skipping system checks")
+            return metrics
+        
+        # CPU Usage (media della finestra invece di uno snapshot di 1 secondo)
+        cpu_percent = resources['cpu_usage']['avg']
         cpu_status = 'healthy' if cpu_percent < self.alert_thresholds['cpu_usage'] else 'warning'
         
         metrics.append(HealthMetric(
@@ -155,20 +258,19 @@ class QuantumHealthMonitor:
         ))
         
         # Memory Usage
-        memory = psutil.virtual_memory()
-        memory_status = 'healthy' if memory.percent < self.alert_thresholds['memory_usage'] else 'warning'
+        memory_percent = resources['memory_usage']['avg']
+        memory_status = 'healthy' if memory_percent < self.alert_thresholds['memory_usage'] else 'warning'
         
         metrics.append(HealthMetric(
             name='memory_usage',
-            value=memory.percent,
+            value=memory_percent,
             threshold=self.alert_thresholds['memory_usage'],
             status=memory_status,
             timestamp=datetime.now()
         ))
         
         # Disk Usage
-        disk = psutil.disk_usage('/')
-        disk_percent = (disk.used / disk.total) * 100
+        disk_percent = resources['disk_usage']['latest']
         disk_status = 'healthy' if disk_percent < 80 else 'warning'
         
         metrics.append(HealthMetric(
@@ -184,23 +286,21 @@ class QuantumHealthMonitor:
     async def check_content_freshness(self) -> HealthMetric:
         """Check freschezza dei contenuti"""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{self.base_url}/assets/data/quantum_data.json") as response:
-                    data = await response.json()
-                    
-                    last_update = datetime.fromisoformat(data.get('last_update', '2000-01-01T00:00:00'))
-                    hours_since_update = (datetime.now() - last_update).total_seconds() / 3600
-                    
-                    # Content should be updated at least every 6 hours
-                    status = 'healthy' if hours_since_update < 6 else 'warning'
-                    
-                    return HealthMetric(
-                        name='content_freshness',
-                        value=hours_since_update,
-                        threshold=6.0,
-                        status=status,
-                        timestamp=datetime.now()
-                    )
+            data = await self.fetch_json(f"{self.base_url}/assets/data/quantum_data.json")
+            
+            last_update = datetime.fromisoformat(data.get('last_update', '2000-01-01T00:00:00'))
+            hours_since_update = (datetime.now() - last_update).total_seconds() / 3600
+            
+            # Content should be updated at least every 6 hours
+            status = 'healthy' if hours_since_update < 6 else 'warning'
+            
+            return HealthMetric(
+                name='content_freshness',
+                value=hours_since_update,
+                threshold=6.0,
+                status=status,
+                timestamp=datetime.now()
+            )
                     
         except Exception as e:
             self.logger.error(f"Content freshness check failed: {e}")
@@ -221,16 +321,16 @@ class QuantumHealthMonitor:
                 'https://amazon.it/dp/B08N5WRWNW?tag=quantumchoic-21'
             ]
             
-            working_links = 0
+            session = await self.get_session()
             
-            for link in test_links:
+            async def probe(link) -> bool:
                 try:
-                    async with aiohttp.ClientSession() as session:
-                        async with session.head(link, timeout=5) as response:
-                            if response.status in [200, 301, 302]:
-                                working_links += 1
-                except:
-                    pass
+                    async with session.head(link, timeout=aiohttp.ClientTimeout(total=5)) as response:
+                        return response.status in [200, 301, 302]
+                except Exception:
+                    return False
+            
+            working_links = sum(await asyncio.gather(*(probe(link) for link in test_links)))
             
             link_health = (working_links / len(test_links)) * 100
             status = 'healthy' if link_health >= 80 else 'warning'
@@ -260,16 +360,17 @@ class QuantumHealthMonitor:
         # Collect all metrics
         all_metrics = []
         
-        # Website checks
-        availability = await self.check_website_availability()
-        response_time = await self.check_response_time()
-        api_health = await self.check_api_health()
-        content_freshness = await self.check_content_freshness()
-        affiliate_links = await self.check_affiliate_links()
-        
-        all_metrics.extend([availability, response_time, api_health, content_freshness, affiliate_links])
+        # Website checks in parallelo, ognuno con la propria deadline: il ciclo dura quanto il probe più lento
+        website_metrics = await asyncio.gather(
+            self.run_probe(self.check_website_availability(), 'availability', self.alert_thresholds['availability'], 0.0),
+            self.run_probe(self.check_response_time(), 'response_time', self.alert_thresholds['response_time'], 10.0),
+            self.run_probe(self.check_api_health(), 'api_health', 90.0, 0.0),
+            self.run_probe(self.check_content_freshness(), 'content_freshness', 6.0, 24.0),
+            self.run_probe(self.check_affiliate_links(), 'affiliate_links', 80.0, 0.0)
+        )
+        all_metrics.extend(website_metrics)
         
-        # System checks
+        # System checks: aggregato già pronto dal sampler in background
         system_metrics = self.check_system_resources()
         all_metrics.extend(system_metrics)
         
@@ -286,27 +387,56 @@ class QuantumHealthMonitor:
                 'threshold': metric.threshold,
                 'status': metric.status,
                 'timestamp': metric.timestamp.isoformat()
-            } for metric in all_metrics}
+            } for metric in all_metrics},
+            'latency': self.latency_report(),
+            'conditional_requests': dict(self.conditional_stats),
+            'system_resources': self.resource_sampler.aggregate()
         }
         
-        # Store metrics
-        self.metrics_history.append(health_report)
-        
-        # Keep only last 24 hours of data
-        cutoff_time = datetime.now() - timedelta(hours=24)
-        self.metrics_history = [
-            report for report in self.metrics_history 
-            if datetime.fromisoformat(report['timestamp']) > cutoff_time
-        ]
+        # Store metrics: un campione per metrica, append O(1) (retention gestita dallo store)
+        self.latest_report = health_report
+        self.metrics_store.record(time.time(), {
+            'overall_score': overall_score,
+            **{metric.name: metric.value for metric in all_metrics}
+        })
         
         # Save to file
         self.save_health_report(health_report)
         
         # Check for alerts
-        await self.check_alerts(all_metrics)
+        await self.check_alerts(all_metrics, health_report['latency'])
         
         return health_report
 
+    def add_latency_snapshot(self, endpoint: str, histogram: LatencyHistogram, failures: int = 0):
+        """Aggiunge l'istogramma di un ciclo alla finestra dell'endpoint (i più vecchi escono)"""
+        window = self.latency_histograms.setdefault(endpoint, deque(maxlen=self.latency_window_cycles))
+        window.append((histogram, failures))
+
+    def latency_report(self) -> Dict[str, Dict[str, float]]:
+        """p50/p90/p99/max per endpoint sulla finestra di cicli, più le richieste fallite"""
+        return {
+            endpoint: {
+                **LatencyHistogram.merged(histogram for histogram, _ in window).summary(),
+                'failures': sum(failures for _, failures in window)
+            }
+            for endpoint, window in self.latency_histograms.items()
+        }
+
+    async def run_probe(self, probe, name: str, threshold: float, failure_value: float) -> HealthMetric:
+        """Esegue un probe entro probe_timeout; oltre la deadline il metric è critico"""
+        try:
+            return await asyncio.wait_for(probe, timeout=self.probe_timeout)
+        except asyncio.TimeoutError:
+            self.logger.error(f"Probe {name} exceeded its {self.probe_timeout:.0f}s deadline")
+            return HealthMetric(
+                name=name,
+                value=failure_value,
+                threshold=threshold,
+                status='critical',
+                timestamp=datetime.now()
+            )
+
     def get_overall_status(self, score: float) -> str:
         """Determina status generale"""
         if score >= 90:
@@ -317,23 +447,39 @@ class QuantumHealthMonitor:
             return 'critical'
 
     def save_health_report(self, report: Dict):
-        """Salva report salute"""
-        with open('assets/data/health_report.json', 'w') as f:
-            json.dump(report, f, indent=2)
-        
-        # Save historical data
-        with open('assets/data/health_history.json', 'w') as f:
-            json.dump(self.metrics_history, f, indent=2)
+        """Salva report salute (lo storico è nel metrics store)"""
+        atomic_write_json('assets/data/health_report.json', report)
 
-    async def check_alerts(self, metrics: List[HealthMetric]):
+    async def check_alerts(self, metrics: List[HealthMetric], latency: Dict[str, Dict[str, float]] = None):
         """Check per alert da inviare"""
-        critical_metrics = [m for m in metrics if m.status == 'critical']
+        latency_metrics = self.latency_alert_metrics(latency or {})
+        critical_metrics = [m for m in metrics + latency_metrics if m.status == 'critical']
         warning_metrics = [m for m in metrics if m.status == 'warning']
+        latency_warnings = [m for m in latency_metrics if m.status == 'warning']
         
         if critical_metrics:
             await self.send_alert('critical', critical_metrics)
-        elif len(warning_metrics) > 2:  # Multiple warnings
-            await self.send_alert('warning', warning_metrics)
+        elif len(warning_metrics) > 2 or latency_warnings:  # Multiple warnings, o p99 oltre soglia
+            await self.send_alert('warning', warning_metrics + latency_warnings)
+
+    def latency_alert_metrics(self, latency: Dict[str, Dict[str, float]]) -> List[HealthMetric]:
+        """p99 per endpoint oltre soglia: warning, oltre il doppio: critical
+
+        Solo con almeno latency_min_samples campioni: con pochi campioni il p99 è il massimo.
+        """
+        threshold = self.alert_thresholds['response_time_p99']
+        metrics = []
+        for endpoint, summary in latency.items():
+            if summary['count'] < self.latency_min_samples or summary['p99'] < threshold:
+                continue
+            metrics.append(HealthMetric(
+                name=f"response_time_p99 {endpoint}",
+                value=summary['p99'],
+                threshold=threshold,
+                status='critical' if summary['p99'] >= 2 * threshold else 'warning',
+                timestamp=datetime.now()
+            ))
+        return metrics
 
     async def send_alert(self, severity: str, metrics: List[HealthMetric]):
         """Invia alert email"""
@@ -373,10 +519,10 @@ class QuantumHealthMonitor:
 
     async def generate_health_dashboard(self):
         """Genera dashboard HTML per monitoraggio"""
-        if not self.metrics_history:
+        if self.latest_report is None:
             return
         
-        latest_report = self.metrics_history[-1]
+        latest_report = self.latest_report
         
         dashboard_html = f"""
         <!DOCTYPE html>
@@ -418,29 +564,32 @@ class QuantumHealthMonitor:
         </html>
         """
         
-        with open('health_dashboard.html', 'w') as f:
-            f.write(dashboard_html)
+        atomic_write_text('health_dashboard.html', dashboard_html)
 
 async def main():
     """Main monitoring loop"""
     monitor = QuantumHealthMonitor()
+    monitor.start()
     
-    while True:
-        try:
-            health_report = await monitor.run_health_check()
-            await monitor.generate_health_dashboard()
+    try:
+        while True:
+            try:
+                health_report = await monitor.run_health_check()
+                await monitor.generate_health_dashboard()
             
-            print(f"🏥 Health Score: {health_report['overall_score']:.1f}% ({health_report['overall_status']})")
+                print(f"🏥 Health Score: {health_report['overall_score']:.1f}% ({health_report['overall_status']})")
             
-            # Sleep for 5 minutes
-            await asyncio.sleep(300)
+                # Sleep for 5 minutes
+                await asyncio.sleep(300)
             
-        except KeyboardInterrupt:
-            print("Monitoring stopped by user")
-            break
-        except Exception as e:
-            print(f"Monitoring error: {e}")
-            await asyncio.sleep(60)  # Wait 1 minute on error
+            except KeyboardInterrupt:
+                print("Monitoring stopped by user")
+                break
+            except Exception as e:
+                print(f"Monitoring error: {e}")
+                await asyncio.sleep(60)  # Wait 1 minute on error
+    finally:
+        await monitor.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+QuantumChoices - Latency Histogram
+Istogramma log-lineare in stile HDR: precisione relativa costante (<1%),
+memoria limitata, snapshot serializzabili e unibili (merge)
+"""
+
+import math
+from typing import Dict, Iterable, Optional
+
+# 2^7 sotto-bucket lineari per ogni potenza di 2: errore relativo massimo 1/128
+SUB_BUCKET_BITS = 7
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+
+# Valori registrati in microsecondi interi
+UNIT_PER_SECOND = 1_000_000
+
+def bucket_index(value: int) -> int:
+    """Indice del bucket di un valore intero (esatto sotto 2 * SUB_BUCKET_COUNT)"""
+    if value < 2 * SUB_BUCKET_COUNT:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    return (shift + 1) * SUB_BUCKET_COUNT + (value >> shift) - SUB_BUCKET_COUNT
+
+def bucket_upper_value(index: int) -> int:
+    """Valore più alto equivalente al bucket (come HdrHistogram)"""
+    if index < 2 * SUB_BUCKET_COUNT:
+        return index
+    shift = index // SUB_BUCKET_COUNT - 1
+    mantissa = index % SUB_BUCKET_COUNT + SUB_BUCKET_COUNT
+    return ((mantissa + 1) << shift) - 1
+
+class LatencyHistogram:
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.total = 0
+        self.sum = 0
+        self.min = None
+        self.max = 0
+
+    def record(self, seconds: float, count: int = 1):
+        """Registra una latenza in secondi"""
+        value = max(0, int(round(seconds * UNIT_PER_SECOND)))
+        index = bucket_index(value)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.total += count
+        self.sum += value * count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: 'LatencyHistogram') -> 'LatencyHistogram':
+        """Somma un altro istogramma in questo (stessa scala: merge esatto)"""
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.total += other.total
+        self.sum += other.sum
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @classmethod
+    def merged(cls, histograms: Iterable['LatencyHistogram']) -> 'LatencyHistogram':
+        """Nuovo istogramma dall'unione di più snapshot"""
+        result = cls()
+        for histogram in histograms:
+            result.merge(histogram)
+        return result
+
+    def percentile(self, q: float) -> float:
+        """Percentile in secondi (nearest-rank, limitato al massimo osservato)"""
+        if not self.total:
+            return 0.0
+        target = max(1, math.ceil(q / 100 * self.total))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(bucket_upper_value(index), self.max) / UNIT_PER_SECOND
+        return self.max / UNIT_PER_SECOND
+
+    def summary(self) -> Dict[str, float]:
+        """Statistiche per il report: count, mean, p50, p90, p99, max (secondi)"""
+        return {
+            'count': self.total,
+            'mean': self.sum / self.total / UNIT_PER_SECOND if self.total else 0.0,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'max': self.max / UNIT_PER_SECOND
+        }
+
+    def to_dict(self) -> Dict:
+        """Snapshot serializzabile in JSON (conteggi sparsi)"""
+        return {
+            'counts': {str(index): count for index, count in sorted(self.counts.items())},
+            'total': self.total,
+            'sum': self.sum,
+            'min': self.min,
+            'max': self.max
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict]) -> 'LatencyHistogram':
+        histogram = cls()
+        if data:
+            histogram.counts = {int(index): count for index, count in data['counts'].items()}
+            histogram.total = data['total']
+            histogram.sum = data['sum']
+            histogram.min = data['min']
+            histogram.max = data['max']
+        return histogram
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+QuantumChoices - Metrics Store
+Serie temporali append-only: ring buffer in memoria, segmenti binari su disco,
+rollup automatici 1m/1h/1d (min/max/avg/p95) e retention per livello
+"""
+
+import glob
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_DTYPE = np.dtype([('timestamp', '<f8'), ('metric_id', '<u2'), ('value', '<f8')])
+ROLLUP_DTYPE = np.dtype([
+    ('timestamp', '<f8'), ('metric_id', '<u2'), ('count', '<u4'),
+    ('min', '<f8'), ('max', '<f8'), ('avg', '<f8'), ('p95', '<f8')
+])
+
+DAY = 86400
+
+# Risoluzione dei rollup in secondi
+ROLLUPS = {'1m': 60, '1h': 3600, '1d': DAY}
+
+# Durata di un segmento su disco per livello (partizione = timestamp // durata, niente date in stringa)
+SEGMENT_SECONDS = {'raw': DAY, '1m': DAY, '1h': 30 * DAY, '1d': 365 * DAY}
+
+# Retention di default per livello, in secondi (None = per sempre)
+DEFAULT_RETENTION = {'raw': 2 * DAY, '1m': 7 * DAY, '1h': 90 * DAY, '1d': None}
+
+class _OpenBucket:
+    __slots__ = ('start', 'values')
+
+    def __init__(self, start: float):
+        self.start = start
+        self.values = []
+
+class MetricsStore:
+    def __init__(self, directory: str = 'assets/data/metrics', ring_size: int = 8192,
+                 retention: Optional[Dict[str, Optional[float]]] = None):
+        self.directory = directory
+        self.retention = {**DEFAULT_RETENTION, **(retention or {})}
+        self.names_path = os.path.join(directory, 'metrics.txt')
+        os.makedirs(directory, exist_ok=True)
+
+        # Dizionario nome -> id, append-only come lo storico prezzi
+        self._metric_ids: Dict[str, int] = {}
+        self._metric_names: List[str] = []
+        if os.path.exists(self.names_path):
+            with open(self.names_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    self._register(line.rstrip('\n'))
+
+        # Ring buffer dei campioni recenti: append O(1), query senza I/O
+        self._ring = np.zeros(ring_size, dtype=SAMPLE_DTYPE)
+        self._ring_count = 0
+
+        # Bucket aperti per (rollup, metrica) e ultimo segmento pulito per livello
+        self._open: Dict[Tuple[str, int], _OpenBucket] = {}
+        self._last_partition = {}
+        self._restore_open_buckets()
+
+    def _register(self, name: str) -> int:
+        metric_id = self._metric_ids[name] = len(self._metric_names)
+        self._metric_names.append(name)
+        return metric_id
+
+    def metric_id(self, name: str) -> int:
+        """Id numerico della metrica (registrato alla prima scrittura)"""
+        metric_id = self._metric_ids.get(name)
+        if metric_id is None:
+            metric_id = self._register(name)
+            with open(self.names_path, 'a', encoding='utf-8') as f:
+                f.write(f'{name}\n')
+        return metric_id
+
+    def _segment_path(self, level: str, timestamp: float) -> str:
+        return os.path.join(self.directory, f'{level}-{int(timestamp // SEGMENT_SECONDS[level])}.bin')
+
+    def _append(self, level: str, records: np.ndarray):
+        """Append dei record nel segmento del loro periodo; al cambio segmento applica la retention"""
+        partition = int(records['timestamp'][0] // SEGMENT_SECONDS[level])
+        with open(self._segment_path(level, records['timestamp'][0]), 'ab') as f:
+            records.tofile(f)
+        if self._last_partition.get(level) != partition:
+            self._last_partition[level] = partition
+            self.apply_retention(level, records['timestamp'][0])
+
+    def record(self, timestamp: float, values: Dict[str, float]):
+        """Registra un campione per ogni metrica (timestamp epoch in secondi)"""
+        records = np.empty(len(values), dtype=SAMPLE_DTYPE)
+        records['timestamp'] = timestamp
+        records['metric_id'] = [self.metric_id(name) for name in values]
+        records['value'] = list(values.values())
+        self._append('raw', records)
+
+        for record in records:
+            self._ring[self._ring_count % len(self._ring)] = record
+            self._ring_count += 1
+            self._update_rollups(timestamp, int(record['metric_id']), float(record['value']))
+
+    def _update_rollups(self, timestamp: float, metric_id: int, value: float):
+        for level, resolution in ROLLUPS.items():
+            start = timestamp - timestamp % resolution
+            bucket = self._open.get((level, metric_id))
+            if bucket is not None and bucket.start != start:
+                self._close_bucket(level, metric_id, bucket)
+                bucket = None
+            if bucket is None:
+                bucket = self._open[(level, metric_id)] = _OpenBucket(start)
+            bucket.values.append(value)
+
+    def _close_bucket(self, level: str, metric_id: int, bucket: _OpenBucket):
+        values = np.asarray(bucket.values, dtype=np.float64)
+        record = np.array([(
+            bucket.start, metric_id, len(values),
+            values.min(), values.max(), values.mean(), np.percentile(values, 95)
+        )], dtype=ROLLUP_DTYPE)
+        self._append(level, record)
+
+    def _restore_open_buckets(self):
+        """Ricostruisce i bucket non ancora chiusi dai campioni raw del periodo corrente"""
+        latest = self._latest_raw_segment()
+        if latest is None:
+            return
+        samples = np.fromfile(latest, dtype=SAMPLE_DTYPE)
+        if not len(samples):
+            return
+        last_timestamp = samples['timestamp'].max()
+        open_since = last_timestamp - last_timestamp % ROLLUPS['1d']
+        for level, resolution in ROLLUPS.items():
+            bucket_start = last_timestamp - last_timestamp % resolution
+            for sample in samples[samples['timestamp'] >= bucket_start]:
+                metric_id = int(sample['metric_id'])
+                bucket = self._open.setdefault((level, metric_id), _OpenBucket(bucket_start))
+                bucket.values.append(float(sample['value']))
+
+        recent = samples[samples['timestamp'] >= open_since][-len(self._ring):]
+        self._ring[:len(recent)] = recent
+        self._ring_count = len(recent)
+
+    def _latest_raw_segment(self) -> Optional[str]:
+        segments = self._segments('raw')
+        return segments[-1][1] if segments else None
+
+    def _segments(self, level: str) -> List[Tuple[int, str]]:
+        """Segmenti su disco del livello, ordinati per partizione"""
+        segments = []
+        for path in glob.glob(os.path.join(self.directory, f'{level}-*.bin')):
+            partition = os.path.basename(path)[len(level) + 1:-len('.bin')]
+            if partition.isdigit():
+                segments.append((int(partition), path))
+        return sorted(segments)
+
+    def apply_retention(self, level: str, now: float):
+        """Elimina i segmenti interamente più vecchi della retention del livello"""
+        retention = self.retention.get(level)
+        if retention is None:
+            return
+        cutoff_partition = int((now - retention) // SEGMENT_SECONDS[level])
+        for partition, path in self._segments(level):
+            if partition < cutoff_partition:
+                os.remove(path)
+                logger.info(f"🧹 Metrics retention: removed {os.path.basename(path)}")
+
+    def query(self, metric: str, start: float, end: float, resolution: str = 'raw') -> np.ndarray:
+        """Campioni (raw) o rollup (1m/1h/1d) di una metrica in [start, end), ordinati per tempo"""
+        metric_id = self._metric_ids.get(metric)
+        dtype = SAMPLE_DTYPE if resolution == 'raw' else ROLLUP_DTYPE
+        if metric_id is None:
+            return np.empty(0, dtype=dtype)
+
+        if resolution == 'raw':
+            ring = self._ring_view()
+            if len(ring) and ring['timestamp'][0] <= start:
+                # Intervallo interamente nel ring buffer: nessun I/O
+                return ring[(ring['metric_id'] == metric_id) & (ring['timestamp'] >= start) & (ring['timestamp'] < end)]
+
+        segment_seconds = SEGMENT_SECONDS[resolution]
+        chunks = []
+        for partition, path in self._segments(resolution):
+            if partition < start // segment_seconds or partition > end // segment_seconds:
+                continue
+            records = np.fromfile(path, dtype=dtype)
+            chunks.append(records[
+                (records['metric_id'] == metric_id) & (records['timestamp'] >= start) & (records['timestamp'] < end)
+            ])
+        if not chunks:
+            return np.empty(0, dtype=dtype)
+        result = np.concatenate(chunks)
+        return result[np.argsort(result['timestamp'], kind='stable')]
+
+    def _ring_view(self) -> np.ndarray:
+        """Contenuto del ring buffer in ordine cronologico"""
+        size = len(self._ring)
+        if self._ring_count <= size:
+            return self._ring[:self._ring_count]
+        split = self._ring_count % size
+        return np.concatenate([self._ring[split:], self._ring[:split]])
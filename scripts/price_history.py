@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+QuantumChoices - Price History
+Storico prezzi colonnare append-only per (categoria, ASIN) e rilevamento ribassi vettorizzato
+"""
+
+import io
+import os
+import time
+from typing import Dict, Sequence
+
+import numpy as np
+import logging
+
+from quantum_io import AtomicFileWriter
+
+logger = logging.getLogger(__name__)
+
+# Record dello storico: solo le variazioni di prezzo (16 byte per record)
+HISTORY_DTYPE = np.dtype([('asin_id', '<u4'), ('price', '<f4'), ('timestamp', '<f8')])
+
+def product_key(category: str, asin: str) -> str:
+    """Chiave dello storico: lo stesso ASIN in categorie diverse è un prodotto distinto"""
+    return f'{category}/{asin}'
+
+class PriceHistory:
+    """Directory con:
+    - asins.txt: dizionario chiave prodotto (product_key) -> id (riga), append-only
+    - prices.bin: record HISTORY_DTYPE append-only
+    - state.npz: ultimo prezzo per id + prezzi prima dell'ultimo snapshot (riscritto in modo atomico)
+    """
+
+    def __init__(self, directory: str = 'assets/data/price_history'):
+        self.directory = directory
+        self.asins_path = os.path.join(directory, 'asins.txt')
+        self.prices_path = os.path.join(directory, 'prices.bin')
+        self.state_path = os.path.join(directory, 'state.npz')
+        os.makedirs(directory, exist_ok=True)
+
+        self._asin_ids: Dict[str, int] = {}
+        if os.path.exists(self.asins_path):
+            with open(self.asins_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    self._asin_ids[line.rstrip('\n')] = len(self._asin_ids)
+
+        # NaN = ASIN mai visto (o senza prezzo)
+        self.current = np.full(len(self._asin_ids), np.nan, dtype=np.float32)
+        self.reference = self.current.copy()
+        self.snapshot = None
+        if os.path.exists(self.state_path):
+            with np.load(self.state_path) as state:
+                size = min(len(state['current']), len(self._asin_ids))
+                self.current[:size] = state['current'][:size]
+                self.reference[:size] = state['reference'][:size]
+                self.snapshot = str(state['snapshot']) or None
+
+    def __len__(self):
+        return len(self._asin_ids)
+
+    def ids_for(self, keys: Sequence[str]) -> np.ndarray:
+        """Id colonnari delle chiavi prodotto, assegnando (e registrando) quelle nuove"""
+        ids = np.empty(len(keys), dtype=np.uint32)
+        new_keys = []
+        for i, key in enumerate(keys):
+            asin_id = self._asin_ids.get(key)
+            if asin_id is None:
+                asin_id = self._asin_ids[key] = len(self._asin_ids)
+                new_keys.append(key)
+            ids[i] = asin_id
+
+        if new_keys:
+            with open(self.asins_path, 'a', encoding='utf-8') as f:
+                f.write(''.join(f'{key}\n' for key in new_keys))
+            grow = np.full(len(new_keys), np.nan, dtype=np.float32)
+            self.current = np.concatenate([self.current, grow])
+            self.reference = np.concatenate([self.reference, grow])
+        return ids
+
+    def update(self, keys: Sequence[str], prices: Sequence[float], snapshot: str,
+               min_drop_pct: float = 5.0) -> Dict[str, np.ndarray]:
+        """Confronta lo snapshot con lo storico in un solo passaggio vettoriale e lo registra
+
+        Idempotente per snapshot: rieseguito sullo stesso snapshot restituisce gli stessi ribassi
+        (confronto con i prezzi precedenti) senza riscrivere lo storico.
+        Restituisce gli indici (nello snapshot) dei prodotti in ribasso, con prezzo precedente e %.
+        """
+        ids = self.ids_for(keys)
+        prices = np.asarray(prices, dtype=np.float32)
+        repeated = snapshot == self.snapshot
+
+        # Chiavi ripetute nello snapshot: vale il primo prezzo, non l'ultimo assegnato
+        _, first, inverse = np.unique(ids, return_index=True, return_inverse=True)
+        if len(first) < len(ids):
+            conflicts = int(np.count_nonzero(prices != prices[first][inverse]))
+            logger.warning(f"⚠️ Price history: {len(ids) - len(first)} duplicate keys in snapshot "
+                           f"({conflicts} with a different price), keeping the first price")
+            prices = prices[first][inverse]
+
+        previous = (self.reference if repeated else self.current)[ids]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            drop_pct = (previous - prices) / previous * 100
+        dropped = np.flatnonzero((previous > 0) & (prices > 0) & (drop_pct >= min_drop_pct))
+
+        if not repeated:
+            unique_ids, unique_prices, unique_previous = ids[first], prices[first], previous[first]
+            changed = np.isnan(unique_previous) | (unique_previous != unique_prices)
+            records = np.empty(int(changed.sum()), dtype=HISTORY_DTYPE)
+            records['asin_id'] = unique_ids[changed]
+            records['price'] = unique_prices[changed]
+            records['timestamp'] = time.time()
+            with open(self.prices_path, 'ab') as f:
+                records.tofile(f)
+
+            self.reference = self.current.copy()
+            self.current[unique_ids] = unique_prices
+            self.snapshot = snapshot
+            self._save_state()
+            logger.info(f"📈 Price history: {len(records)} price changes recorded ({len(self)} products tracked)")
+
+        return {
+            'index': dropped,
+            'previous_price': previous[dropped],
+            'drop_pct': drop_pct[dropped]
+        }
+
+    def _save_state(self):
+        buffer = io.BytesIO()
+        np.savez(buffer, current=self.current, reference=self.reference, snapshot=np.array(self.snapshot or ''))
+        with AtomicFileWriter(self.state_path, 'wb') as f:
+            f.write(buffer.getvalue())
+
+    def history(self, key: str) -> np.ndarray:
+        """Record storici (timestamp, price) di una chiave product_key"""
+        asin_id = self._asin_ids.get(key)
+        if asin_id is None or not os.path.exists(self.prices_path) or os.path.getsize(self.prices_path) == 0:
+            return np.empty(0, dtype=HISTORY_DTYPE)
+        records = np.memmap(self.prices_path, dtype=HISTORY_DTYPE, mode='r')
+        return np.array(records[records['asin_id'] == asin_id])
@@ -14,17 +14,25 @@ import openai
 import os
 import requests
 from bs4 import BeautifulSoup
-import schedule
 import time
+import random
 from dataclasses import dataclass
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import logging
+import sys
+import glob
+import hashlib
+
+from quantum_cache import QuantumCache
+from quantum_io import JSONObjectStreamWriter, atomic_write_json, load_json
+from quantum_ranking import TopKRanker
+from quantum_scheduler import QuantumScheduler, every
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-@dataclass
+@dataclass(slots=True)
 class Product:
     asin: str
     title: str
@@ -36,10 +44,157 @@ class Product:
     features: List[str]
     quantum_score: float = 0.0
 
+class ProductBatch:
+    """Catalogo prodotti colonnare: array NumPy, categorie codificate e features internate"""
+
+    def __init__(self, asins, titles, prices, ratings, review_counts, category_codes, categories,
+                 descriptions, feature_offsets, feature_ids, feature_vocab, quantum_scores=None):
+        self.asins = np.asarray(asins, dtype=str)
+        self.titles = np.asarray(titles, dtype=object)
+        self.prices = np.asarray(prices, dtype=np.float64)
+        self.ratings = np.asarray(ratings, dtype=np.float64)
+        self.review_counts = np.asarray(review_counts, dtype=np.int32)
+        # Categoria come codice intero + tabella delle categorie distinte
+        self.category_codes = np.asarray(category_codes, dtype=np.int16)
+        self.categories = list(categories)
+        self.descriptions = np.asarray(descriptions, dtype=object)
+        # Features in formato CSR: feature_ids[feature_offsets[i]:feature_offsets[i + 1]]
+        self.feature_offsets = np.asarray(feature_offsets, dtype=np.int32)
+        self.feature_ids = np.asarray(feature_ids, dtype=np.int32)
+        self.feature_vocab = list(feature_vocab)
+        if quantum_scores is None:
+            quantum_scores = np.zeros(len(self.asins), dtype=np.float32)
+        self.quantum_scores = np.asarray(quantum_scores, dtype=np.float32)
+
+    @classmethod
+    def from_products(cls, products: List[Product]) -> 'ProductBatch':
+        """Costruisce il batch da una lista di Product"""
+        category_index = {}
+        feature_index = {}
+        category_codes = []
+        feature_offsets = [0]
+        feature_ids = []
+
+        for product in products:
+            category_codes.append(category_index.setdefault(product.category, len(category_index)))
+            for feature in product.features:
+                feature_ids.append(feature_index.setdefault(sys.intern(feature), len(feature_index)))
+            feature_offsets.append(len(feature_ids))
+
+        return cls(
+            asins=[p.asin for p in products],
+            titles=[p.title for p in products],
+            prices=[p.price for p in products],
+            ratings=[p.rating for p in products],
+            review_counts=[p.review_count for p in products],
+            category_codes=category_codes,
+            categories=category_index,
+            descriptions=[p.description for p in products],
+            feature_offsets=feature_offsets,
+            feature_ids=feature_ids,
+            feature_vocab=feature_index,
+            quantum_scores=[p.quantum_score for p in products]
+        )
+
+    def __len__(self) -> int:
+        return len(self.asins)
+
+    def __getitem__(self, index: int) -> Product:
+        """Accesso per riga: materializza un Product"""
+        start, end = self.feature_offsets[index], self.feature_offsets[index + 1]
+        return Product(
+            asin=str(self.asins[index]),
+            title=self.titles[index],
+            price=float(self.prices[index]),
+            rating=float(self.ratings[index]),
+            review_count=int(self.review_counts[index]),
+            category=self.categories[self.category_codes[index]],
+            description=self.descriptions[index],
+            features=[self.feature_vocab[i] for i in self.feature_ids[start:end]],
+            quantum_score=round(float(self.quantum_scores[index]), 1)
+        )
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def category_values(self) -> np.ndarray:
+        """Colonna categorie decodificata"""
+        return np.asarray(self.categories, dtype=str)[self.category_codes]
+
+    @property
+    def nbytes(self) -> int:
+        """Memoria occupata dagli array numerici"""
+        return sum(column.nbytes for column in (
+            self.asins, self.prices, self.ratings, self.review_counts, self.category_codes,
+            self.feature_offsets, self.feature_ids, self.quantum_scores
+        ))
+
+# Prezzi medi per categoria (simula database lookup)
+CATEGORY_AVERAGE_PRICES = {
+    'tech': 199.99,
+    'home': 89.99,
+    'fitness': 79.99,
+    'kitchen': 129.99
+}
+DEFAULT_AVERAGE_PRICE = 99.99
+
+def price_value_scores(prices, avg_prices) -> np.ndarray:
+    """Score rapporto qualità-prezzo vettoriale"""
+    prices = np.asarray(prices, dtype=np.float64)
+    avg_prices = np.asarray(avg_prices, dtype=np.float64)
+    return np.where(
+        prices <= avg_prices * 0.8, 1.0,        # Ottimo valore
+        np.where(prices <= avg_prices * 1.2,    # Buon valore
+                 0.7, 0.4)                      # Sopra media
+    )
+
+def compute_objective_scores(ratings, review_counts, prices, avg_prices) -> Dict[str, np.ndarray]:
+    """Sub-score oggettivi (0-1, non pesati) calcolati su colonne di prodotti"""
+    ratings = np.asarray(ratings, dtype=np.float64)
+    review_counts = np.asarray(review_counts, dtype=np.float64)
+    return {
+        'rating': ratings / 5.0,
+        # Review count score (logaritmico)
+        'review_count': np.minimum(np.log10(review_counts + 1) / 4, 1.0),
+        'price_value': price_value_scores(prices, avg_prices)
+    }
+
+# Errori OpenAI transitori per cui ha senso ritentare
+RETRYABLE_AI_ERRORS = (
+    openai.APIConnectionError,  # include APITimeoutError
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
 class QuantumAnalyzer:
-    def __init__(self):
-        self.openai_client = openai.OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+    def __init__(self, max_concurrent_per_category: int = 10, max_concurrent_total: int = 25,
+                 openai_client: Optional[openai.AsyncOpenAI] = None,
+                 ai_timeout: float = 20.0, ai_max_retries: int = 3,
+                 ai_cache: Optional[QuantumCache] = None, ai_batch_size: int = 10,
+                 incremental: bool = False):
+        # Client async: connessioni HTTP riusate, nessun blocco dell'event loop
+        # (retry gestiti da _chat_completion, non dal client)
+        self.openai_client = openai_client or openai.AsyncOpenAI(
+            api_key=os.getenv('OPENAI_API_KEY'),
+            timeout=ai_timeout,
+            max_retries=0
+        )
+        self._owns_openai_client = openai_client is None
+        self.ai_timeout = ai_timeout
+        self.ai_max_retries = ai_max_retries
+        # Cache persistente dei feature score AI (assets/cache/)
+        self.ai_cache = ai_cache or QuantumCache()
+        # Prodotti per singola richiesta AI (1 = una richiesta per prodotto)
+        self.ai_batch_size = ai_batch_size
+        self.batch_stats = []
+        # Modalità incrementale: ricalcola solo le componenti con input cambiati
+        self.incremental = incremental
+        self.previous_scoring_state = {}
         self.session = None
+        # Limiti di concorrenza per il calcolo dei Quantum Score
+        self.max_concurrent_per_category = max_concurrent_per_category
+        self.max_concurrent_total = max_concurrent_total
+        self._global_semaphore = None
         self.scoring_weights = {
             'rating': 0.25,
             'review_count': 0.15,
@@ -55,36 +210,230 @@ class QuantumAnalyzer:
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         if self.session:
             await self.session.close()
+        if self._owns_openai_client:
+            await self.openai_client.close()
+        logger.info(f"🗄️ AI cache stats: {self.ai_cache.get_stats()}")
+        if self.batch_stats:
+            avg_latency = np.mean([b['latency'] for b in self.batch_stats])
+            failed = sum(1 for b in self.batch_stats if b['error'])
+            logger.info(f"📦 Batch AI: {len(self.batch_stats)} richieste ({failed} fallite), "
+                        f"latenza media {avg_latency:.2f}s")
+        self.ai_cache.close()
+
+    async def _chat_completion(self, **kwargs):
+        """Chat completion async con timeout per chiamata e retry con backoff jitterato"""
+        for attempt in range(self.ai_max_retries + 1):
+            try:
+                return await self.openai_client.chat.completions.create(
+                    timeout=self.ai_timeout,
+                    **kwargs
+                )
+            except RETRYABLE_AI_ERRORS as e:
+                if attempt == self.ai_max_retries:
+                    raise
+                # Full jitter: attesa casuale in [0, 0.5 * 2^attempt] secondi
+                delay = random.uniform(0, 0.5 * 2 ** attempt)
+                logger.warning(f"⏳ AI retry {attempt + 1}/{self.ai_max_retries} tra {delay:.2f}s: {e}")
+                await asyncio.sleep(delay)
 
-    async def analyze_trending_products(self, categories: List[str]) -> Dict:
-        """Analisi prodotti trending con approccio quantistico"""
+    async def analyze_trending_products(self, categories: List[str], stream_to: Optional[str] = None) -> Dict:
+        """Analisi prodotti trending con approccio quantistico
+        
+        Con stream_to le categorie vengono scritte su disco nell'ordine dell'input, ciascuna
+        appena lei e le precedenti sono completate; in memoria resta solo il risultato senza scoring_state.
+        """
         logger.info("🔬 Avvio analisi trending products...")
         
+        self._global_semaphore = asyncio.Semaphore(self.max_concurrent_total)
+        
+        if self.incremental:
+            self.previous_scoring_state = self.load_previous_scoring_state()
+        
+        if stream_to is None:
+            # Categorie analizzate in parallelo, output nello stesso ordine dell'input
+            category_results = await asyncio.gather(
+                *(self.analyze_category(category) for category in categories)
+            )
+            return dict(zip(categories, category_results))
+        
+        async def analyze(index: int):
+            return index, await self.analyze_category(categories[index])
+        
+        # Risultati arrivati fuori ordine restano in attesa finché non è pronta la categoria precedente
         results = {}
-        for category in categories:
-            logger.info(f"📊 Analizzando categoria: {category}")
-            
-            # 1. Scraping dati Amazon (simulato)
-            products = await self.scrape_category_products(category)
-            
-            # 2. Analisi AI per ogni prodotto
-            analyzed_products = []
-            for product in products:
-                quantum_score = await self.calculate_quantum_score(product)
-                product.quantum_score = quantum_score
-                analyzed_products.append(product)
-            
-            # 3. Ranking basato su quantum score
-            top_products = sorted(analyzed_products, key=lambda p: p.quantum_score, reverse=True)[:10]
+        buffered = {}
+        next_index = 0
+        with JSONObjectStreamWriter(stream_to, ensure_ascii=False) as writer:
+            for next_category in asyncio.as_completed([analyze(i) for i in range(len(categories))]):
+                index, data = await next_category
+                buffered[index] = data
+                while next_index in buffered:
+                    category, data = categories[next_index], buffered.pop(next_index)
+                    writer.write_item(category, data)
+                    data.pop('scoring_state', None)
+                    results[category] = data
+                    next_index += 1
+        
+        logger.info(f"💾 Analisi completa salvata in {stream_to}")
+        return {category: results[category] for category in categories}
+
+    async def analyze_category(self, category: str) -> Dict:
+        """Analisi singola categoria con scoring concorrente dei prodotti"""
+        logger.info(f"📊 Analizzando categoria: {category}")
+        
+        # 1. Scraping dati Amazon (simulato)
+        products = await self.scrape_category_products(category)
+        
+        # 2. Score oggettivi per tutta la categoria in un solo passaggio vettoriale
+        batch = ProductBatch.from_products(products)
+        objective = self.calculate_batch_objective_scores(batch)
+        
+        # 3. Riuso componenti AI/sentiment con input invariati (modalità incrementale)
+        fingerprints = [self.fingerprint_product(p) for p in products]
+        feature_scores, sentiment_scores, rescoring_counts = self.plan_incremental_scoring(
+            products, fingerprints, self.previous_scoring_state.get(category, {})
+        )
+        if self.incremental:
+            logger.info(f"♻️ {category}: {rescoring_counts['skipped']} invariati, "
+                        f"{rescoring_counts['partial']} ricalcolati in parte, "
+                        f"{rescoring_counts['full']} ricalcolati completamente")
+        
+        # 4. Feature score AI a batch: una task per batch, avviate subito e non attese qui
+        pending = [i for i, score in enumerate(feature_scores) if score is None]
+        feature_batches = {}
+        if self.ai_batch_size > 1 and pending:
+            for start in range(0, len(pending), self.ai_batch_size):
+                chunk = pending[start:start + self.ai_batch_size]
+                task = asyncio.ensure_future(self.analyze_features_batch([products[i] for i in chunk]))
+                for position, i in enumerate(chunk):
+                    feature_batches[i] = (task, position)
+        
+        # 5. Ranking streaming: ogni prodotto entra nel top-10 appena il suo batch (e il sentiment) è pronto
+        objective_part = self.weighted_objective_scores(objective)
+        category_semaphore = asyncio.Semaphore(self.max_concurrent_per_category)
+        ranker = TopKRanker(10)
+        components = [None] * len(products)
+        
+        async def score_product(i: int):
+            feature_score = feature_scores[i]
+            if i in feature_batches:
+                task, position = feature_batches[i]
+                feature_score = (await task)[position]
+            return i, await self.analyze_components_bounded(
+                products[i], category_semaphore, feature_score, sentiment_scores[i]
+            )
+        
+        for next_scored in asyncio.as_completed([score_product(i) for i in range(len(products))]):
+            i, (feature_score, sentiment_score) = await next_scored
+            components[i] = (feature_score, sentiment_score)
             
-            results[category] = {
-                'products': [self.product_to_dict(p) for p in top_products],
-                'analysis_timestamp': datetime.now().isoformat(),
-                'total_analyzed': len(products),
-                'avg_quantum_score': np.mean([p.quantum_score for p in top_products])
+            product = products[i]
+            product.quantum_score = self.finalize_quantum_score(objective_part[i], feature_score, sentiment_score)
+            ranker.push(product.quantum_score, product.asin, product)
+        
+        top_products = ranker.ranked()
+        
+        # Stato per la prossima esecuzione incrementale
+        scoring_state = {
+            product.asin: {
+                'fingerprints': fingerprint,
+                'components': {
+                    'rating': float(objective['rating'][i]),
+                    'review_count': float(objective['review_count'][i]),
+                    'price_value': float(objective['price_value'][i]),
+                    'feature': float(components[i][0]),
+                    'sentiment': float(components[i][1])
+                }
             }
+            for i, (product, fingerprint) in enumerate(zip(products, fingerprints))
+        }
+        
+        return {
+            'products': [self.product_to_dict(p) for p in top_products],
+            'analysis_timestamp': datetime.now().isoformat(),
+            'total_analyzed': len(products),
+            'avg_quantum_score': np.mean([p.quantum_score for p in top_products]),
+            'rescoring': rescoring_counts,
+            'scoring_state': scoring_state
+        }
+
+    def fingerprint_product(self, product: Product) -> Dict[str, str]:
+        """Hash degli input di ogni gruppo di componenti dello score"""
+        def digest(*values) -> str:
+            payload = json.dumps(values, ensure_ascii=False, separators=(',', ':'))
+            return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+        
+        return {
+            # rating, review_count, sentiment
+            'metrics': digest(product.rating, product.review_count),
+            # price_value
+            'price': digest(product.price, CATEGORY_AVERAGE_PRICES.get(product.category, DEFAULT_AVERAGE_PRICE)),
+            # feature score AI
+            'features': digest(product.title, product.category, product.features, product.description)
+        }
+
+    def plan_incremental_scoring(self, products: List[Product], fingerprints: List[Dict],
+                                 previous_state: Dict) -> Tuple[List, List, Dict]:
+        """Componenti AI/sentiment riutilizzabili (None = da calcolare) e conteggi skipped/partial/full"""
+        feature_scores = [None] * len(products)
+        sentiment_scores = [None] * len(products)
+        counts = {'skipped': 0, 'partial': 0, 'full': 0}
+        
+        for i, (product, fingerprint) in enumerate(zip(products, fingerprints)):
+            previous = previous_state.get(product.asin) if self.incremental else None
+            if previous is None:
+                counts['full'] += 1
+                continue
             
-        return results
+            changed = {group for group, value in fingerprint.items()
+                       if previous['fingerprints'].get(group) != value}
+            if 'features' not in changed:
+                feature_scores[i] = previous['components']['feature']
+            if 'metrics' not in changed:
+                sentiment_scores[i] = previous['components']['sentiment']
+            
+            if not changed:
+                counts['skipped'] += 1
+            elif len(changed) == len(fingerprint):
+                counts['full'] += 1
+            else:
+                counts['partial'] += 1
+        
+        return feature_scores, sentiment_scores, counts
+
+    def load_previous_scoring_state(self) -> Dict:
+        """Stato di scoring dell'ultima analisi salvata ({categoria: {asin: stato}})"""
+        analysis_files = sorted(glob.glob('assets/data/analysis_*.json'))
+        if not analysis_files:
+            logger.info("♻️ Nessuna analisi precedente: ricalcolo completo")
+            return {}
+        
+        try:
+            previous_results = load_json(analysis_files[-1])
+        except (OSError, ValueError) as e:
+            logger.warning(f"Previous analysis not readable ({analysis_files[-1]}): {e}")
+            return {}
+        
+        return {
+            category: data.get('scoring_state', {})
+            for category, data in previous_results.items()
+        }
+
+    async def analyze_components_bounded(self, product: Product, category_semaphore: asyncio.Semaphore,
+                                         feature_score: Optional[float] = None,
+                                         sentiment_score: Optional[float] = None) -> Tuple[float, float]:
+        """Componenti AI e sentiment rispettando i limiti per categoria e globali"""
+        if feature_score is not None and sentiment_score is not None:
+            return feature_score, sentiment_score
+        
+        async with category_semaphore:
+            async with self._get_global_semaphore():
+                return await self.analyze_ai_components(product, feature_score, sentiment_score)
+
+    def _get_global_semaphore(self) -> asyncio.Semaphore:
+        if self._global_semaphore is None:
+            self._global_semaphore = asyncio.Semaphore(self.max_concurrent_total)
+        return self._global_semaphore
 
     async def scrape_category_products(self, category: str) -> List[Product]:
         """Scraping responsabile con rispetto robots.txt"""
@@ -109,58 +458,94 @@ class QuantumAnalyzer:
         await asyncio.sleep(1)  # Simula tempo scraping
         return mock_products
 
-    async def calculate_quantum_score(self, product: Product) -> float:
+    async def calculate_quantum_score(self, product: Product, feature_score: Optional[float] = None) -> float:
         """Calcolo Quantum Score con AI analysis"""
         
         # 1. Score base da metriche oggettive
-        rating_score = (product.rating / 5.0) * self.scoring_weights['rating']
-        
-        # Review count score (logaritmico)
-        review_score = min(np.log10(product.review_count + 1) / 4, 1.0) * self.scoring_weights['review_count']
+        objective = self.calculate_objective_scores(
+            [product.rating], [product.review_count], [product.price], [product.category]
+        )
         
-        # Price-value analysis
-        category_avg_price = await self.get_category_average_price(product.category)
-        price_value_score = self.calculate_price_value_score(product.price, category_avg_price)
-        price_value_score *= self.scoring_weights['price_value']
-        
-        # 2. AI analysis delle features
-        feature_score = await self.analyze_features_with_ai(product)
-        feature_score *= self.scoring_weights['feature_analysis']
-        
-        # 3. Sentiment analysis delle recensioni
-        sentiment_score = await self.analyze_review_sentiment(product.asin)
-        sentiment_score *= self.scoring_weights['sentiment_score']
+        # 2. AI analysis delle features + sentiment delle recensioni
+        feature_score, sentiment_score = await self.analyze_ai_components(product, feature_score)
         
         # Quantum Score finale
-        quantum_score = rating_score + review_score + price_value_score + feature_score + sentiment_score
+        quantum_score = float(self.combine_quantum_scores(objective, [feature_score], [sentiment_score])[0])
+        
+        logger.info(f"📈 Quantum Score per {product.title}: {quantum_score}")
+        return quantum_score
+
+    async def analyze_ai_components(self, product: Product, feature_score: Optional[float] = None,
+                                    sentiment_score: Optional[float] = None) -> Tuple[float, float]:
+        """Feature score AI e sentiment score (se non già disponibili)"""
+        if feature_score is None:
+            feature_score = await self.analyze_features_with_ai(product)
         
-        logger.info(f"📈 Quantum Score per {product.title}: {quantum_score:.2f}")
-        return round(quantum_score * 10, 1)  # Scale 0-10
+        if sentiment_score is None:
+            sentiment_score = await self.analyze_review_sentiment(product.asin)
+        return feature_score, sentiment_score
+
+    def category_average_prices(self, categories) -> np.ndarray:
+        """Prezzi medi per una colonna di categorie (un lookup per categoria distinta)"""
+        unique_categories, inverse = np.unique(np.asarray(categories, dtype=str), return_inverse=True)
+        averages = np.array(
+            [CATEGORY_AVERAGE_PRICES.get(c, DEFAULT_AVERAGE_PRICE) for c in unique_categories],
+            dtype=np.float64
+        )
+        return averages[inverse]
+
+    def calculate_objective_scores(self, ratings, review_counts, prices, categories) -> Dict[str, np.ndarray]:
+        """Sub-score oggettivi colonnari (rating, review_count, price_value)"""
+        return compute_objective_scores(ratings, review_counts, prices, self.category_average_prices(categories))
+
+    def calculate_batch_objective_scores(self, batch: ProductBatch) -> Dict[str, np.ndarray]:
+        """Sub-score oggettivi di un ProductBatch (lookup prezzi sui codici categoria)"""
+        averages = np.array(
+            [CATEGORY_AVERAGE_PRICES.get(c, DEFAULT_AVERAGE_PRICE) for c in batch.categories],
+            dtype=np.float64
+        )
+        return compute_objective_scores(
+            batch.ratings, batch.review_counts, batch.prices, averages[batch.category_codes]
+        )
+
+    def weighted_objective_scores(self, objective: Dict[str, np.ndarray]) -> np.ndarray:
+        """Somma pesata dei sub-score oggettivi (0-1)"""
+        return (
+            objective['rating'] * self.scoring_weights['rating']
+            + objective['review_count'] * self.scoring_weights['review_count']
+            + objective['price_value'] * self.scoring_weights['price_value']
+        )
+
+    def combine_quantum_scores(self, objective: Dict[str, np.ndarray], feature_scores, sentiment_scores) -> np.ndarray:
+        """Applica scoring_weights ai sub-score e restituisce Quantum Score 0-10"""
+        quantum_scores = (
+            self.weighted_objective_scores(objective)
+            + np.asarray(feature_scores, dtype=np.float64) * self.scoring_weights['feature_analysis']
+            + np.asarray(sentiment_scores, dtype=np.float64) * self.scoring_weights['sentiment_score']
+        )
+        return np.round(quantum_scores * 10, 1)  # Scale 0-10
+
+    def finalize_quantum_score(self, objective_part: float, feature_score: float, sentiment_score: float) -> float:
+        """Quantum Score 0-10 di un singolo prodotto (stesso arrotondamento di combine_quantum_scores)"""
+        quantum_score = (
+            objective_part
+            + feature_score * self.scoring_weights['feature_analysis']
+            + sentiment_score * self.scoring_weights['sentiment_score']
+        )
+        return float(np.round(quantum_score * 10, 1))
 
     async def get_category_average_price(self, category: str) -> float:
         """Calcola prezzo medio categoria"""
         # Simula database lookup
-        category_averages = {
-            'tech': 199.99,
-            'home': 89.99,
-            'fitness': 79.99,
-            'kitchen': 129.99
-        }
-        return category_averages.get(category, 99.99)
+        return CATEGORY_AVERAGE_PRICES.get(category, DEFAULT_AVERAGE_PRICE)
 
     def calculate_price_value_score(self, price: float, avg_price: float) -> float:
         """Score basato su rapporto qualità-prezzo"""
-        if price <= avg_price * 0.8:  # Ottimo valore
-            return 1.0
-        elif price <= avg_price * 1.2:  # Buon valore
-            return 0.7
-        else:  # Sopra media
-            return 0.4
+        return float(price_value_scores(price, avg_price))
 
-    async def analyze_features_with_ai(self, product: Product) -> float:
-        """Analisi AI delle caratteristiche prodotto"""
-        try:
-            prompt = f"""
+    def _feature_request_params(self, product: Product) -> Dict:
+        """Parametri richiesta AI per il feature score di un prodotto"""
+        prompt = f"""
             Analizza le seguenti caratteristiche del prodotto e assegna un punteggio 0-1:
             
             Prodotto: {product.title}
@@ -176,21 +561,159 @@ class QuantumAnalyzer:
             
             Rispondi solo con un numero decimale tra 0 e 1.
             """
+        
+        return {
+            'model': "gpt-3.5-turbo",
+            'messages': [{"role": "user", "content": prompt}],
+            'max_tokens': 10,
+            'temperature': 0.1
+        }
+
+    def _feature_cache_key(self, product: Product) -> str:
+        return QuantumCache.make_key(kind='feature_score', **self._feature_request_params(product))
+
+    async def analyze_features_with_ai(self, product: Product) -> float:
+        """Analisi AI delle caratteristiche prodotto"""
+        try:
+            request_params = self._feature_request_params(product)
             
-            response = self.openai_client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=10,
-                temperature=0.1
-            )
+            cache_key = self._feature_cache_key(product)
+            cached_score = self.ai_cache.get(cache_key)
+            if cached_score is not None:
+                return cached_score
+            
+            response = await self._chat_completion(**request_params)
             
             score = float(response.choices[0].message.content.strip())
-            return max(0.0, min(1.0, score))
+            score = max(0.0, min(1.0, score))
+            self.ai_cache.set(cache_key, score)
+            return score
             
         except Exception as e:
             logger.error(f"AI analysis error: {e}")
             return 0.5  # Default score
 
+    async def analyze_features_batch(self, products: List[Product]) -> List[float]:
+        """Feature score AI per più prodotti, ai_batch_size prodotti per richiesta"""
+        scores = [None] * len(products)
+        
+        # I risultati in cache (anche da chiamate singole) non vengono richiesti
+        pending = []
+        for i, product in enumerate(products):
+            cached_score = self.ai_cache.get(self._feature_cache_key(product))
+            if cached_score is not None:
+                scores[i] = cached_score
+            else:
+                pending.append(i)
+        
+        batches = [pending[i:i + self.ai_batch_size] for i in range(0, len(pending), self.ai_batch_size)]
+        batch_results = await asyncio.gather(
+            *(self._score_feature_batch([products[i] for i in batch]) for batch in batches),
+            return_exceptions=True
+        )
+        
+        fallback = []
+        for batch, results in zip(batches, batch_results):
+            if isinstance(results, Exception):
+                # Errore di trasporto/API già ritentato: score di default (non in cache), niente fan-out
+                for i in batch:
+                    scores[i] = 0.5
+                continue
+            for i, score in zip(batch, results):
+                if score is None:
+                    fallback.append(i)
+                else:
+                    scores[i] = score
+                    self.ai_cache.set(self._feature_cache_key(products[i]), score)
+        
+        # Fallback a chiamate singole solo per le voci non interpretabili
+        if fallback:
+            logger.warning(f"🔁 Batch AI: {len(fallback)} prodotti rianalizzati singolarmente")
+            fallback_scores = await asyncio.gather(
+                *(self._analyze_features_bounded(products[i]) for i in fallback)
+            )
+            for i, score in zip(fallback, fallback_scores):
+                scores[i] = score
+        
+        return scores
+
+    async def _analyze_features_bounded(self, product: Product) -> float:
+        async with self._get_global_semaphore():
+            return await self.analyze_features_with_ai(product)
+
+    async def _score_feature_batch(self, products: List[Product]) -> List[Optional[float]]:
+        """Singola richiesta AI per un batch; None per le voci non interpretabili
+
+        Gli errori della richiesta (dopo i retry) vengono rilanciati al chiamante.
+        """
+        product_lines = "\n".join(
+            f"{i + 1}. Prodotto: {p.title} | Categoria: {p.category} | "
+            f"Caratteristiche: {', '.join(p.features)} | Descrizione: {p.description}"
+            for i, p in enumerate(products)
+        )
+        
+        prompt = f"""
+            Analizza le caratteristiche dei seguenti {len(products)} prodotti e assegna a ciascuno un punteggio 0-1:
+            
+            {product_lines}
+            
+            Valuta:
+            - Innovazione tecnologica
+            - Utilità pratica
+            - Qualità costruttiva percepita
+            - Completezza features
+            
+            Rispondi solo con un array JSON di {len(products)} numeri decimali tra 0 e 1, nello stesso ordine dei prodotti.
+            """
+        
+        results = [None] * len(products)
+        async with self._get_global_semaphore():
+            # Latenza della sola richiesta (retry inclusi), senza l'attesa del semaforo
+            start_time = time.perf_counter()
+            try:
+                response = await self._chat_completion(
+                    model="gpt-3.5-turbo",
+                    messages=[{"role": "user", "content": prompt}],
+                    max_tokens=8 * len(products) + 20,
+                    temperature=0.1
+                )
+            except Exception as e:
+                self.batch_stats.append({
+                    'batch_size': len(products),
+                    'parsed': 0,
+                    'latency': time.perf_counter() - start_time,
+                    'error': True
+                })
+                logger.error(f"AI batch request error: {e}")
+                raise
+            latency = time.perf_counter() - start_time
+        
+        try:
+            parsed = json.loads(response.choices[0].message.content.strip())
+            # Array di lunghezza diversa: le posizioni non sono affidabili, tutto il batch va in fallback
+            if not isinstance(parsed, list) or len(parsed) != len(products):
+                logger.warning(f"⚠️ Batch AI: attesi {len(products)} score, risposta non allineata: {parsed!r:.80}")
+            else:
+                for i, value in enumerate(parsed):
+                    try:
+                        results[i] = max(0.0, min(1.0, float(value)))
+                    except (TypeError, ValueError):
+                        pass
+                        
+        except Exception as e:
+            logger.error(f"AI batch parse error: {e}")
+        
+        parsed_count = sum(1 for r in results if r is not None)
+        self.batch_stats.append({
+            'batch_size': len(products),
+            'parsed': parsed_count,
+            'latency': latency,
+            'error': False
+        })
+        logger.info(f"📦 Batch AI: {parsed_count}/{len(products)} score in {latency:.2f}s")
+        
+        return results
+
     async def analyze_review_sentiment(self, asin: str) -> float:
         """Sentiment analysis delle recensioni"""
         try:
@@ -222,7 +745,7 @@ class QuantumAnalyzer:
             Formato JSON.
             """
             
-            response = self.openai_client.chat.completions.create(
+            response = await self._chat_completion(
                 model="gpt-3.5-turbo",
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=500,
@@ -248,13 +771,13 @@ class QuantumAnalyzer:
             'features': product.features
         }
 
-    async def save_analysis_results(self, results: Dict):
+    async def save_analysis_results(self, results: Dict, write_backup: bool = True):
         """Salva risultati in formato utilizzabile dal sito"""
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         
-        # Salva dati completi per backup
-        with open(f'assets/data/analysis_{timestamp}.json', 'w') as f:
-            json.dump(results, f, indent=2, ensure_ascii=False)
+        # Salva dati completi per backup (già scritti se l'analisi era in streaming)
+        if write_backup:
+            atomic_write_json(f'assets/data/analysis_{timestamp}.json', results, ensure_ascii=False)
         
         # Salva dati per sito (formato ottimizzato)
         site_data = {
@@ -269,23 +792,25 @@ class QuantumAnalyzer:
                 'total_analyzed': data['total_analyzed']
             }
         
-        with open('assets/data/quantum_data.json', 'w') as f:
-            json.dump(site_data, f, indent=2, ensure_ascii=False)
+        atomic_write_json('assets/data/quantum_data.json', site_data, compact=True, ensure_ascii=False)
         
         logger.info(f"💾 Risultati salvati: {len(results)} categorie analizzate")
 
-async def main():
+async def main(incremental: bool = False):
     """Main execution function"""
     categories = ['tech', 'home', 'fitness', 'kitchen']
     
-    async with QuantumAnalyzer() as analyzer:
+    async with QuantumAnalyzer(incremental=incremental) as analyzer:
         logger.info("🚀 Avvio QuantumAnalyzer...")
         
-        # Analisi prodotti trending
-        results = await analyzer.analyze_trending_products(categories)
+        # Analisi prodotti trending (backup completo scritto in streaming)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        results = await analyzer.analyze_trending_products(
+            categories, stream_to=f'assets/data/analysis_{timestamp}.json'
+        )
         
         # Salva risultati
-        await analyzer.save_analysis_results(results)
+        await analyzer.save_analysis_results(results, write_backup=False)
         
         # Genera suggerimenti contenuti
         all_products = []
@@ -294,24 +819,24 @@ async def main():
         
         content_suggestions = await analyzer.generate_content_suggestions(all_products)
         
-        with open('assets/data/content_suggestions.json', 'w') as f:
-            json.dump(content_suggestions, f, indent=2, ensure_ascii=False)
+        atomic_write_json('assets/data/content_suggestions.json', content_suggestions, ensure_ascii=False)
         
         logger.info("✅ Analisi completata con successo!")
 
 def schedule_analysis():
     """Pianifica analisi automatiche"""
+    scheduler = QuantumScheduler()
+    
     # Analisi completa ogni 6 ore
-    schedule.every(6).hours.do(lambda: asyncio.run(main()))
+    scheduler.add_job('full-analysis', lambda: asyncio.run(main()), every(timedelta(hours=6)))
     
     # Quick update ogni ora
-    schedule.every().hour.do(lambda: asyncio.run(quick_update()))
+    scheduler.add_job('quick-update', lambda: asyncio.run(quick_update()), every(timedelta(hours=1)))
     
     logger.info("⏰ Scheduler configurato: analisi ogni 6 ore")
     
-    while True:
-        schedule.run_pending()
-        time.sleep(60)
+    # Nessun polling: il loop dorme fino alla prossima scadenza
+    scheduler.run_forever()
 
 async def quick_update():
     """Update veloce per dati real-time"""
@@ -319,8 +844,7 @@ async def quick_update():
     
     # Update prezzi e availability
     try:
-        with open('assets/data/quantum_data.json', 'r') as f:
-            data = json.load(f)
+        data = load_json('assets/data/quantum_data.json')
         
         # Simula update prezzi
         for category in data['categories']:
@@ -331,8 +855,7 @@ async def quick_update():
         
         data['last_update'] = datetime.now().isoformat()
         
-        with open('assets/data/quantum_data.json', 'w') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        atomic_write_json('assets/data/quantum_data.json', data, compact=True, ensure_ascii=False)
         
         logger.info("✅ Quick update completato")
         
@@ -342,5 +865,7 @@ async def quick_update():
 if __name__ == "__main__":
     if len(os.sys.argv) > 1 and os.sys.argv[1] == "schedule":
         schedule_analysis()
+    elif len(os.sys.argv) > 1 and os.sys.argv[1] == "incremental":
+        asyncio.run(main(incremental=True))
     else:
         asyncio.run(main())
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+QuantumChoices - Cache persistente per risultati AI
+Cache content-addressed a due livelli: LRU in memoria + SQLite su disco
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+class QuantumCache:
+    def __init__(self, path: str = 'assets/cache/ai_cache.db', ttl_seconds: float = 7 * 24 * 3600,
+                 max_entries: int = 50000, memory_entries: int = 2000, access_flush_every: int = 100):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+
+        # Front tier in-process: key -> (value, expires_at)
+        self._memory = OrderedDict()
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0}
+
+        # last_access degli hit su disco, scritti a blocchi (ogni access_flush_every hit, in prune e close)
+        self._pending_access: Dict[str, float] = {}
+        self.access_flush_every = access_flush_every
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._db = sqlite3.connect(path)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_cache_last_access ON cache(last_access)")
+        self._db.commit()
+
+    @staticmethod
+    def make_key(**inputs) -> str:
+        """Hash stabile degli input (prompt + parametri modello)"""
+        payload = json.dumps(inputs, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Legge dalla cache (memoria, poi disco); None se assente o scaduto"""
+        now = time.time()
+
+        entry = self._memory.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at > now:
+                self._memory.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return value
+            del self._memory[key]
+
+        row = self._db.execute(
+            "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is not None and row[1] > now:
+            self._pending_access[key] = now
+            if len(self._pending_access) >= self.access_flush_every:
+                self.flush_access_times()
+            value = json.loads(row[0])
+            self._remember(key, value, row[1])
+            self.stats['disk_hits'] += 1
+            return value
+
+        self.stats['misses'] += 1
+        return None
+
+    def set(self, key: str, value: Any):
+        """Scrive in entrambi i livelli, applicando il limite LRU su disco"""
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        self._pending_access.pop(key, None)
+
+        self._db.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(value, ensure_ascii=False), expires_at, now)
+        )
+        self._db.commit()
+        self._remember(key, value, expires_at)
+        self.stats['writes'] += 1
+
+        if self.stats['writes'] % 100 == 0:
+            self.prune()
+
+    def flush_access_times(self):
+        """Scrive i last_access in sospeso con un solo commit"""
+        if not self._pending_access:
+            return
+        self._db.executemany(
+            "UPDATE cache SET last_access = ? WHERE key = ?",
+            [(last_access, key) for key, last_access in self._pending_access.items()]
+        )
+        self._db.commit()
+        self._pending_access.clear()
+
+    def prune(self):
+        """Rimuove voci scadute e le meno usate oltre max_entries"""
+        # L'eviction LRU deve vedere gli accessi più recenti
+        self.flush_access_times()
+        cursor = self._db.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+        evicted = cursor.rowcount
+
+        (count,) = self._db.execute("SELECT COUNT(*) FROM cache").fetchone()
+        if count > self.max_entries:
+            cursor = self._db.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY last_access ASC LIMIT ?)",
+                (count - self.max_entries,)
+            )
+            evicted += cursor.rowcount
+
+        self._db.commit()
+        self.stats['evictions'] += evicted
+
+    def _remember(self, key: str, value: Any, expires_at: float):
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_stats(self) -> Dict:
+        """Contatori hit/miss"""
+        hits = self.stats['memory_hits'] + self.stats['disk_hits']
+        lookups = hits + self.stats['misses']
+        return {**self.stats, 'hit_rate': hits / lookups if lookups else 0.0}
+
+    def close(self):
+        self.prune()
+        self._db.close()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+QuantumChoices - I/O sicuro per assets/data
+Backend JSON veloce (orjson/ujson se installati), scritture atomiche
+(file temporaneo + fsync + rename) e writer JSON streaming
+"""
+
+import json
+import os
+import tempfile
+from typing import Any, Iterable, Iterator
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+# Backend selezionato: orjson per load e dump, ujson solo per load
+# (il suo dump formatta diversamente), altrimenti stdlib
+JSON_BACKEND = 'orjson' if orjson else 'ujson' if ujson else 'json'
+
+# Serializzazione compatta per i payload serviti dal sito
+COMPACT_SEPARATORS = (',', ':')
+
+def loads(data):
+    """Parsing JSON con il backend più veloce disponibile"""
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass  # es. NaN/Infinity o interi fuori range: decide la stdlib
+    elif ujson is not None:
+        try:
+            return ujson.loads(data)
+        except ValueError:
+            pass
+    if isinstance(data, (bytes, bytearray)):
+        data = data.decode('utf-8')
+    return json.loads(data)
+
+def load_json(path: str) -> Any:
+    """Legge un file JSON"""
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+_WHITESPACE = ' \t\n\r'
+
+def iter_json_array(path: str, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """Legge un array JSON elemento per elemento, con memoria limitata a ~chunk_size + un elemento"""
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = ''
+        pos = 0
+        eof = False
+
+        def fill() -> bool:
+            nonlocal buffer, pos, eof
+            chunk = f.read(chunk_size)
+            if not chunk:
+                eof = True
+                return False
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            return True
+
+        def next_token() -> str:
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                    pos += 1
+                if pos < len(buffer):
+                    return buffer[pos]
+                if not fill():
+                    raise ValueError(f"{path}: array JSON incompleto")
+
+        if next_token() != '[':
+            raise ValueError(f"{path}: atteso un array JSON")
+        pos += 1
+
+        if next_token() == ']':
+            return
+
+        while True:
+            next_token()
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+                # Il valore è completo solo se seguito da ',' o ']' (es. numeri troncati)
+                delimiter = end
+                while delimiter < len(buffer) and buffer[delimiter] in _WHITESPACE:
+                    delimiter += 1
+                complete = delimiter < len(buffer) and buffer[delimiter] in ',]'
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                complete = False
+            if not complete and not eof and fill():
+                continue
+            if not complete:
+                raise ValueError(f"{path}: array JSON non valido o incompleto")
+
+            pos = delimiter + 1
+            yield item
+
+            if buffer[delimiter] == ']':
+                return
+
+def iter_jsonl(path: str) -> Iterator[Any]:
+    """Legge un file JSON Lines (un oggetto per riga)"""
+    with open(path, 'rb') as f:
+        for line in f:
+            if line.strip():
+                yield loads(line)
+
+def dumps(data: Any, compact: bool = False, ensure_ascii: bool = True) -> str:
+    """Serializza come json.dumps(indent=2) o in forma compatta, stesso risultato con ogni backend
+
+    Unica differenza con orjson: NaN/Infinity diventano null (JSON valido) invece di NaN.
+    """
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | (0 if compact else orjson.OPT_INDENT_2)
+        try:
+            encoded = orjson.dumps(data, option=option)
+        except TypeError:
+            encoded = None  # tipi non supportati (es. chiavi non stringa, NaN): stdlib
+        # orjson emette sempre UTF-8: con ensure_ascii vale solo se l'output è già ASCII
+        if encoded is not None and (not ensure_ascii or encoded.isascii()):
+            return encoded.decode('utf-8')
+    return _stdlib_dumps(data, compact, ensure_ascii)
+
+def _stdlib_dumps(data: Any, compact: bool, ensure_ascii: bool) -> str:
+    if compact:
+        return json.dumps(data, separators=COMPACT_SEPARATORS, ensure_ascii=ensure_ascii)
+    return json.dumps(data, indent=2, ensure_ascii=ensure_ascii)
+
+def _fsync_directory(directory: str):
+    """Rende persistente il rename (no-op dove le directory non sono apribili)"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+class AtomicFileWriter:
+    """File scritto in un temporaneo accanto alla destinazione e rinominato solo a fine scrittura"""
+
+    def __init__(self, path: str, mode: str = 'w'):
+        self.path = path
+        self.mode = mode
+        self.directory = os.path.dirname(os.path.abspath(path))
+        self._file = None
+        self._temp_path = None
+
+    def __enter__(self):
+        os.makedirs(self.directory, exist_ok=True)
+        fd, self._temp_path = tempfile.mkstemp(
+            prefix=f'.{os.path.basename(self.path)}.', suffix='.tmp', dir=self.directory
+        )
+        encoding = None if 'b' in self.mode else 'utf-8'
+        self._file = os.fdopen(fd, self.mode, encoding=encoding)
+        return self._file
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            if exc_type is None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            self._file.close()
+        except BaseException:
+            os.unlink(self._temp_path)
+            raise
+
+        if exc_type is not None:
+            # Scrittura interrotta: il file originale resta intatto
+            os.unlink(self._temp_path)
+            return False
+
+        # mkstemp crea file 0600: mantiene i permessi del file esistente (o 0644)
+        try:
+            mode = os.stat(self.path).st_mode & 0o777
+        except FileNotFoundError:
+            mode = 0o644
+        os.chmod(self._temp_path, mode)
+        os.replace(self._temp_path, self.path)
+        _fsync_directory(self.directory)
+        return False
+
+def atomic_write_text(path: str, text: str):
+    """Scrive un file di testo in modo atomico"""
+    with AtomicFileWriter(path) as f:
+        f.write(text)
+
+def atomic_write_json(path: str, data: Any, compact: bool = False, ensure_ascii: bool = True):
+    """Scrive JSON in modo atomico (indent=2, oppure compatto per il sito)"""
+    atomic_write_text(path, dumps(data, compact, ensure_ascii))
+
+def atomic_write_json_array(path: str, items: Iterable[Any], compact: bool = False, ensure_ascii: bool = True) -> int:
+    """Scrive un array JSON da un iterabile senza materializzarlo; restituisce il numero di elementi"""
+    count = 0
+    with AtomicFileWriter(path) as f:
+        f.write('[')
+        for item in items:
+            separator = ',' if count else ''
+            if compact:
+                f.write(f'{separator}{dumps(item, True, ensure_ascii)}')
+            else:
+                f.write(f'{separator}\n  ' + dumps(item, False, ensure_ascii).replace('\n', '\n  '))
+            count += 1
+        f.write(']' if compact or not count else '\n]')
+    return count
+
+class JSONObjectStreamWriter:
+    """Scrive un oggetto JSON una chiave alla volta; il file compare solo a scrittura completata"""
+
+    def __init__(self, path: str, compact: bool = False, ensure_ascii: bool = True):
+        self.compact = compact
+        self.ensure_ascii = ensure_ascii
+        self._writer = AtomicFileWriter(path)
+        self._file = None
+        self._count = 0
+
+    def __enter__(self):
+        self._file = self._writer.__enter__()
+        self._file.write('{')
+        return self
+
+    def write_item(self, key: str, value: Any):
+        """Aggiunge una coppia chiave/valore e la scrive subito su disco"""
+        separator = ',' if self._count else ''
+        key_json = json.dumps(key, ensure_ascii=self.ensure_ascii)
+        if self.compact:
+            self._file.write(f'{separator}{key_json}:{dumps(value, True, self.ensure_ascii)}')
+        else:
+            value_json = dumps(value, False, self.ensure_ascii).replace('\n', '\n  ')
+            self._file.write(f'{separator}\n  {key_json}: {value_json}')
+        self._file.flush()
+        self._count += 1
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self._file.write('}' if self.compact or not self._count else '\n}')
+        return self._writer.__exit__(exc_type, exc_val, exc_tb)
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+QuantumChoices - Ranking Top-K
+Classifica streaming con heap: memoria O(K), pari merito ordinati per ASIN
+"""
+
+import heapq
+from typing import Any, Iterable, List
+
+class _RankedEntry:
+    __slots__ = ('score', 'asin', 'item')
+
+    def __init__(self, score: float, asin: str, item: Any):
+        self.score = score
+        self.asin = asin
+        self.item = item
+
+    def __lt__(self, other: '_RankedEntry') -> bool:
+        # "Minore" = peggiore in classifica: la radice del min-heap è il candidato da scartare
+        if self.score != other.score:
+            return self.score < other.score
+        return self.asin > other.asin
+
+class TopKRanker:
+    def __init__(self, k: int):
+        self.k = k
+        self._heap = []
+        self.seen = 0
+
+    def push(self, score: float, asin: str, item: Any = None):
+        """Aggiunge un elemento, mantenendo solo i migliori K"""
+        self.seen += 1
+        if self.k <= 0:
+            return
+
+        entry = _RankedEntry(score, asin, item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif self._heap[0] < entry:
+            heapq.heapreplace(self._heap, entry)
+
+    def extend(self, items: Iterable[dict]):
+        """Aggiunge dict prodotto con chiavi 'quantum_score' e 'asin'"""
+        for item in items:
+            self.push(item['quantum_score'], item['asin'], item)
+
+    def ranked(self) -> List[Any]:
+        """Elementi in ordine: score decrescente, poi ASIN crescente"""
+        return [entry.item for entry in sorted(self._heap, reverse=True)]
+
+    def __len__(self) -> int:
+        return len(self._heap)
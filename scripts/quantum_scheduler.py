@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+QuantumChoices - Scheduler
+Job ricorrenti in una coda a priorità per scadenza: il loop dorme esattamente
+fino al prossimo job invece di fare polling
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+def _parse_time(at: str):
+    hour, minute = (int(part) for part in at.split(':'))
+    return hour, minute
+
+def every(interval: timedelta) -> Callable[[datetime], datetime]:
+    """Ricorrenza a intervallo fisso"""
+    return lambda after: after + interval
+
+def daily(at: str = '00:00') -> Callable[[datetime], datetime]:
+    """Ogni giorno all'ora indicata (HH:MM, ora locale)"""
+    hour, minute = _parse_time(at)
+
+    def next_due(after: datetime) -> datetime:
+        due = after.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        return due if due > after else due + timedelta(days=1)
+    return next_due
+
+def weekly(weekday: int = 0, at: str = '00:00') -> Callable[[datetime], datetime]:
+    """Ogni settimana nel giorno indicato (0 = lunedì)"""
+    at_time = daily(at)
+
+    def next_due(after: datetime) -> datetime:
+        due = at_time(after)
+        return due + timedelta(days=(weekday - due.weekday()) % 7)
+    return next_due
+
+def monthly(day: int = 1, at: str = '00:00') -> Callable[[datetime], datetime]:
+    """Ogni mese nel giorno indicato (1-28)"""
+    hour, minute = _parse_time(at)
+
+    def next_due(after: datetime) -> datetime:
+        due = after.replace(day=day, hour=hour, minute=minute, second=0, microsecond=0)
+        if due <= after:
+            year, month = (due.year + 1, 1) if due.month == 12 else (due.year, due.month + 1)
+            due = due.replace(year=year, month=month)
+        return due
+    return next_due
+
+class ScheduledJob:
+    __slots__ = ('name', 'func', 'next_due', 'due_at', 'runs')
+
+    def __init__(self, name: str, func: Callable[[], Any], next_due: Callable[[datetime], datetime], due_at: datetime):
+        self.name = name
+        self.func = func
+        self.next_due = next_due
+        self.due_at = due_at
+        self.runs = 0
+
+class QuantumScheduler:
+    def __init__(self):
+        # Min-heap: (scadenza, sequenza, job); la sequenza rompe i pari merito in ordine di inserimento
+        self._queue: List = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+
+    def add_job(self, name: str, func: Callable[[], Any], next_due: Callable[[datetime], datetime],
+                run_immediately: bool = False) -> ScheduledJob:
+        """Registra un job ricorrente; next_due(dopo) calcola la scadenza successiva"""
+        now = datetime.now()
+        job = ScheduledJob(name, func, next_due, now if run_immediately else next_due(now))
+        self._push(job)
+        logger.info(f"⏰ Job '{name}' scheduled for {job.due_at:%Y-%m-%d %H:%M}")
+        return job
+
+    def _push(self, job: ScheduledJob):
+        with self._lock:
+            heapq.heappush(self._queue, (job.due_at, next(self._sequence), job))
+        # Il loop ricalcola l'attesa: il nuovo job potrebbe scadere prima
+        self._wakeup.set()
+
+    def next_job(self) -> Optional[ScheduledJob]:
+        """Prossimo job in scadenza"""
+        with self._lock:
+            return self._queue[0][2] if self._queue else None
+
+    def run_pending(self) -> int:
+        """Esegue i job scaduti e li rischedula; restituisce quanti ne ha eseguiti"""
+        executed = 0
+        while True:
+            with self._lock:
+                if not self._queue or self._queue[0][0] > datetime.now():
+                    return executed
+                _, _, job = heapq.heappop(self._queue)
+
+            logger.info(f"▶️ Running job '{job.name}'")
+            start_time = time.perf_counter()
+            try:
+                job.func()
+            except Exception as e:
+                logger.error(f"Job '{job.name}' failed: {e}")
+            job.runs += 1
+            executed += 1
+
+            # Scadenza successiva calcolata da adesso: niente raffiche di recupero dopo un job lungo
+            job.due_at = job.next_due(max(job.due_at, datetime.now()))
+            logger.info(
+                f"✅ Job '{job.name}' done in {time.perf_counter() - start_time:.1f}s, "
+                f"next run {job.due_at:%Y-%m-%d %H:%M}"
+            )
+            self._push(job)
+
+    def run_forever(self):
+        """Loop: dorme fino alla prossima scadenza (o a un nuovo job / stop)"""
+        while not self._stopped:
+            self._wakeup.clear()
+            self.run_pending()
+            job = self.next_job()
+            timeout = None if job is None else max(0.0, (job.due_at - datetime.now()).total_seconds())
+            self._wakeup.wait(timeout)
+
+    def stop(self):
+        self._stopped = True
+        self._wakeup.set()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+QuantumChoices - Resource Sampler
+Campionamento in background di CPU, memoria, disco e processo su una finestra mobile
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+import logging
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+# Campi di ogni campione (oltre al timestamp)
+SAMPLE_FIELDS = ('cpu_usage', 'memory_usage', 'disk_usage', 'process_cpu', 'process_rss_mb')
+
+# Attesa minima tra l'inizializzazione dei contatori CPU e il primo campione (sotto è solo rumore 0/100%)
+PRIME_DELAY = 0.25
+
+class ResourceSampler:
+    def __init__(self, interval: float = 5.0, window: float = 300.0, disk_path: str = '/'):
+        self.interval = interval
+        self.disk_path = disk_path
+        self._samples = deque(maxlen=max(1, int(window / interval)))
+        self._process = psutil.Process()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Avvia il thread di campionamento (idempotente, non bloccante)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='resource-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        # Sul thread del sampler: inizializza i contatori CPU e prende il primo campione reale dopo
+        # un breve intervallo, così la finestra non parte mai da un valore di CPU senza significato
+        psutil.cpu_percent(interval=None)
+        self._process.cpu_percent(interval=None)
+        if self._stop.wait(min(PRIME_DELAY, self.interval)):
+            return
+        try:
+            self.sample()
+        except Exception as e:
+            logger.warning(f"Resource sampling failed: {e}")
+
+        while not self._stop.wait(self.interval):
+            try:
+                self.sample()
+            except Exception as e:
+                logger.warning(f"Resource sampling failed: {e}")
+
+    def sample(self) -> Dict[str, float]:
+        """Registra un campione (CPU misurata dall'ultimo campione, senza attese)"""
+        disk = psutil.disk_usage(self.disk_path)
+        with self._process.oneshot():
+            process_cpu = self._process.cpu_percent(interval=None)
+            process_rss = self._process.memory_info().rss
+        sample = {
+            'timestamp': time.time(),
+            'cpu_usage': psutil.cpu_percent(interval=None),
+            'memory_usage': psutil.virtual_memory().percent,
+            'disk_usage': disk.used / disk.total * 100,
+            'process_cpu': process_cpu,
+            'process_rss_mb': process_rss / 1024 / 1024
+        }
+        with self._lock:
+            self._samples.append(sample)
+        return sample
+
+    def aggregate(self) -> Optional[Dict[str, Dict[str, float]]]:
+        """Ultimo valore, media e massimo per campo sulla finestra; None se non ci sono campioni"""
+        with self._lock:
+            samples = list(self._samples)
+        if not samples:
+            return None
+
+        aggregate = {
+            'samples': len(samples),
+            'window_seconds': samples[-1]['timestamp'] - samples[0]['timestamp']
+        }
+        for field in SAMPLE_FIELDS:
+            values = [sample[field] for sample in samples]
+            aggregate[field] = {
+                'latest': values[-1],
+                'avg': sum(values) / len(values),
+                'max': max(values)
+            }
+        return aggregate
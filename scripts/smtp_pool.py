@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+QuantumChoices - SMTP Connection Pool
+Sessioni SMTP autenticate riutilizzate per invii massivi + rate limiting token bucket
+"""
+
+import queue
+import smtplib
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+def is_connection_error(error: BaseException) -> bool:
+    """True se la sessione SMTP va scartata e ricreata (SMTPException è sottoclasse di OSError)"""
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+class TokenBucket:
+    """Rate limiter: `rate` messaggi al secondo, burst fino a `capacity`"""
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def wait_time(self, tokens: float = 1.0) -> float:
+        """Consuma i token e restituisce quanto attendere prima di usarli (0 se subito)"""
+        with self._lock:
+            self._refill()
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self, tokens: float = 1.0):
+        """Blocca finché non ci sono token disponibili"""
+        delay = self.wait_time(tokens)
+        if delay > 0:
+            time.sleep(delay)
+
+class SMTPConnectionPool:
+    def __init__(self, host: str, port: int, user: str = None, password: str = None,
+                 size: int = 2, max_messages_per_connection: int = 100,
+                 starttls: bool = True, timeout: float = 30.0):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.size = size
+        self.max_messages_per_connection = max_messages_per_connection
+        self.starttls = starttls
+        self.timeout = timeout
+
+        # Connessioni inattive: (server, messaggi già inviati)
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self.stats = {'connections_opened': 0, 'reconnects': 0, 'messages_sent': 0}
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        server.ehlo()
+        if self.starttls:
+            server.starttls()
+            server.ehlo()
+        if self.user and self.password:
+            server.login(self.user, self.password)
+        self.stats['connections_opened'] += 1
+        return server
+
+    @staticmethod
+    def _close(server: smtplib.SMTP):
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def _checkout(self):
+        self._slots.acquire()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            try:
+                return self._connect(), 0
+            except BaseException:
+                self._slots.release()
+                raise
+
+    def _checkin(self, server: smtplib.SMTP, sent: int):
+        if sent >= self.max_messages_per_connection:
+            # Riciclo periodico: evita limiti per-sessione lato server
+            self._close(server)
+        else:
+            self._idle.put((server, sent))
+        self._slots.release()
+
+    def send_message(self, msg, retries: int = 1):
+        """Invia un messaggio su una sessione del pool, riconnettendo in caso di caduta"""
+        self._send(lambda server: server.send_message(msg), retries)
+
+    def sendmail(self, from_addr: str, to_addrs, data: bytes, retries: int = 1):
+        """Invia un messaggio già serializzato (byte RFC 5322 con CRLF)"""
+        self._send(lambda server: server.sendmail(from_addr, to_addrs, data), retries)
+
+    def _send(self, send, retries: int):
+        server, sent = self._checkout()
+        try:
+            for attempt in range(retries + 1):
+                try:
+                    send(server)
+                    break
+                except Exception as e:
+                    if not is_connection_error(e):
+                        raise
+                    self._close(server)
+                    server = None
+                    if attempt == retries:
+                        raise
+                    logger.warning(f"SMTP connection lost ({e}), reconnecting...")
+                    self.stats['reconnects'] += 1
+                    server, sent = self._connect(), 0
+        except BaseException:
+            if server is not None:
+                self._checkin(server, sent + 1)
+            else:
+                self._slots.release()
+            raise
+
+        self.stats['messages_sent'] += 1
+        self._checkin(server, sent + 1)
+
+    def close(self):
+        """Chiude tutte le sessioni inattive"""
+        while True:
+            try:
+                server, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._close(server)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+QuantumChoices - Subscriber Store
+Archivio SQLite indicizzato dei subscribers (status, segmenti, categorie, frequenza)
+"""
+
+import os
+import sqlite3
+from typing import Dict, Iterable, Iterator, List, Optional
+import logging
+
+from quantum_io import dumps, load_json, loads
+
+logger = logging.getLogger(__name__)
+
+class SubscriberStore:
+    def __init__(self, path: str = 'assets/data/subscribers.db'):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._db = sqlite3.connect(path)
+        self._db.executescript("""
+            PRAGMA journal_mode = WAL;
+            CREATE TABLE IF NOT EXISTS subscribers (
+                id TEXT PRIMARY KEY,
+                email TEXT NOT NULL UNIQUE,
+                status TEXT,
+                frequency TEXT,
+                data TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS subscriber_segments (
+                subscriber_id TEXT NOT NULL,
+                segment TEXT NOT NULL,
+                PRIMARY KEY (segment, subscriber_id)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS subscriber_categories (
+                subscriber_id TEXT NOT NULL,
+                category TEXT NOT NULL,
+                PRIMARY KEY (category, subscriber_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_subscribers_status_frequency ON subscribers(status, frequency);
+            CREATE INDEX IF NOT EXISTS idx_subscribers_frequency ON subscribers(frequency);
+            CREATE INDEX IF NOT EXISTS idx_segments_subscriber ON subscriber_segments(subscriber_id);
+            CREATE INDEX IF NOT EXISTS idx_categories_subscriber ON subscriber_categories(subscriber_id);
+        """)
+
+    def import_json(self, path: str = 'assets/data/subscribers.json') -> int:
+        """Import one-shot da subscribers.json (sostituisce il contenuto attuale)"""
+        subscribers = load_json(path)
+        with self._db:
+            self._db.execute("DELETE FROM subscriber_segments")
+            self._db.execute("DELETE FROM subscriber_categories")
+            self._db.execute("DELETE FROM subscribers")
+            self._insert(subscribers)
+        logger.info(f"📥 Importati {len(subscribers)} subscribers da {path}")
+        return len(subscribers)
+
+    def upsert(self, subscriber: Dict):
+        """Inserisce o aggiorna un subscriber"""
+        with self._db:
+            self._db.execute("DELETE FROM subscriber_segments WHERE subscriber_id = ?", (subscriber['id'],))
+            self._db.execute("DELETE FROM subscriber_categories WHERE subscriber_id = ?", (subscriber['id'],))
+            self._insert([subscriber])
+
+    def _insert(self, subscribers: Iterable[Dict]):
+        rows, segments, categories = [], [], []
+        for subscriber in subscribers:
+            preferences = subscriber.get('preferences', {})
+            rows.append((
+                subscriber['id'],
+                subscriber['email'],
+                subscriber.get('status'),
+                preferences.get('frequency'),
+                dumps(subscriber, compact=True, ensure_ascii=False)
+            ))
+            segments.extend((subscriber['id'], s) for s in subscriber.get('segments', []))
+            categories.extend((subscriber['id'], c) for c in preferences.get('categories', []))
+
+        self._db.executemany("INSERT OR REPLACE INTO subscribers VALUES (?, ?, ?, ?, ?)", rows)
+        self._db.executemany("INSERT OR IGNORE INTO subscriber_segments VALUES (?, ?)", segments)
+        self._db.executemany("INSERT OR IGNORE INTO subscriber_categories VALUES (?, ?)", categories)
+
+    def _where(self, status: Optional[str], frequency: Optional[str],
+               segments: Optional[List[str]], categories: Optional[List[str]]):
+        clauses, params = [], []
+        if status is not None:
+            clauses.append("s.status = ?")
+            params.append(status)
+        if frequency is not None:
+            clauses.append("s.frequency = ?")
+            params.append(frequency)
+        if segments:
+            clauses.append(
+                f"s.id IN (SELECT subscriber_id FROM subscriber_segments "
+                f"WHERE segment IN ({', '.join('?' * len(segments))}))"
+            )
+            params.extend(segments)
+        if categories:
+            clauses.append(
+                f"s.id IN (SELECT subscriber_id FROM subscriber_categories "
+                f"WHERE category IN ({', '.join('?' * len(categories))}))"
+            )
+            params.extend(categories)
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def iter_subscribers(self, status: Optional[str] = None, frequency: Optional[str] = None,
+                         segments: Optional[List[str]] = None, categories: Optional[List[str]] = None,
+                         batch_size: int = 1000) -> Iterator[Dict]:
+        """Subscribers filtrati via indici; segmenti/categorie: almeno uno in comune
+
+        Nessun ORDER BY: le righe escono nell'ordine dell'indice usato, senza sort temporaneo.
+        """
+        where, params = self._where(status, frequency, segments, categories)
+        cursor = self._db.execute(f"SELECT s.data FROM subscribers s{where}", params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            for (data,) in rows:
+                yield loads(data)
+
+    def count(self, status: Optional[str] = None, frequency: Optional[str] = None,
+              segments: Optional[List[str]] = None, categories: Optional[List[str]] = None) -> int:
+        """Numero di subscribers che soddisfano i filtri"""
+        where, params = self._where(status, frequency, segments, categories)
+        (total,) = self._db.execute(f"SELECT COUNT(*) FROM subscribers s{where}", params).fetchone()
+        return total
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,535 @@
+#!/usr/bin/env python3
+"""
+QuantumChoices - Unit Test offline
+Test dei componenti senza rete né browser: python -m unittest scripts/test_quantum_units.py
+"""
+
+import asyncio
+import email
+import json
+import os
+import smtplib
+import sys
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta
+from email.header import decode_header, make_header
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from campaign_journal import CampaignJournal
+from email_automation import EmailAutomation
+from email_delivery import AsyncDeliveryEngine
+from email_skeleton import MessageSkeleton
+from metrics_store import MetricsStore
+from price_history import PriceHistory, product_key
+from quantum_analyzer import Product, QuantumAnalyzer
+from quantum_cache import QuantumCache
+from quantum_io import iter_json_array
+from quantum_ranking import TopKRanker
+from quantum_scheduler import QuantumScheduler, daily, every, monthly, weekly
+from resource_sampler import PRIME_DELAY, ResourceSampler
+
+class AsyncDeliveryEngineTest(unittest.TestCase):
+    def test_outcomes_and_report(self):
+        results = []
+
+        def send(job):
+            if job == 'refused':
+                raise smtplib.SMTPDataError(550, b'no such user')
+            if job == 'busy':
+                raise smtplib.SMTPDataError(451, b'try later')
+
+        engine = AsyncDeliveryEngine(send, concurrency=2, queue_size=2, max_retries=2, base_delay=0)
+        report = asyncio.run(engine.run(
+            ['a', 'refused', 'b', 'busy', 'c'],
+            on_result=lambda job, status, error: results.append((job, status))
+        ))
+
+        self.assertEqual((report['sent'], report['failed'], report['deferred']), (3, 1, 1))
+        self.assertEqual(report['retries'], 2)
+        self.assertEqual(report['total'], 5)
+        self.assertEqual(sorted(results), [
+            ('a', 'sent'), ('b', 'sent'), ('busy', 'deferred'), ('c', 'sent'), ('refused', 'failed')
+        ])
+
+    def test_on_result_error_does_not_deadlock_producer(self):
+        def send(job):
+            raise smtplib.SMTPDataError(550, b'no such user')
+
+        def on_result(job, status, error):
+            raise RuntimeError('journal write failed')
+
+        engine = AsyncDeliveryEngine(send, concurrency=2, queue_size=5, base_delay=0)
+        with self.assertRaises(RuntimeError):
+            asyncio.run(asyncio.wait_for(engine.run(range(100), on_result=on_result), 5))
+
+    def test_on_result_error_after_success_is_not_a_send_failure(self):
+        sent = []
+
+        def on_result(job, status, error):
+            if status == 'sent' and job == 3:
+                raise KeyError('email')
+
+        engine = AsyncDeliveryEngine(sent.append, concurrency=1, queue_size=1, base_delay=0)
+        with self.assertRaises(KeyError):
+            asyncio.run(asyncio.wait_for(engine.run(range(50), on_result=on_result), 5))
+        # Il job 3 è stato inviato una sola volta (nessun retry dovuto all'errore di on_result)
+        self.assertEqual(sent.count(3), 1)
+
+class MessageSkeletonTest(unittest.TestCase):
+    def test_render_round_trip(self):
+        html_body = (
+            '<p>Ciao {{name}}, ecco le offerte più convenienti della settimana: qualità = prezzo!</p>'
+            + '<p>' + 'Testo lungo per forzare i soft line break. ' * 10 + '</p>'
+            + '<a href="{{unsubscribe}}">Disiscriviti</a>'
+        )
+        skeleton = MessageSkeleton('Offerte è qui', 'news@quantumchoices.it', html_body,
+                                   ['{{name}}', '{{unsubscribe}}'])
+        fields = {'name': 'Niccolò', 'unsubscribe': 'https://quantumchoices.it/u?id=42&t=a=b'}
+
+        raw = skeleton.render('mario@example.com', {'{{' + k + '}}': v for k, v in fields.items()})
+        message = email.message_from_bytes(raw)
+        body = message.get_payload()[0].get_payload(decode=True).decode('utf-8').replace('\r\n', '\n')
+
+        expected = html_body.replace('{{name}}', fields['name']).replace('{{unsubscribe}}', fields['unsubscribe'])
+        self.assertEqual(body, expected)
+        self.assertEqual(message['To'], 'mario@example.com')
+        self.assertEqual(str(make_header(decode_header(message['Subject']))), 'Offerte è qui')
+
+class IterJsonArrayTest(unittest.TestCase):
+    def write(self, text):
+        fd, path = tempfile.mkstemp(suffix='.json')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_chunk_boundaries(self):
+        items = [
+            {'asin': 'B000000001', 'title': 'Cuffie "pro", [edizione] {2026}', 'price': 129.99},
+            12345678901234567890, -0.5e-3, 'città, ], [', None, True, [], {},
+            {'nested': [[1, 2], {'a': 'b\\"c'}]}
+        ]
+        path = self.write(json.dumps(items, ensure_ascii=False, indent=2))
+        for chunk_size in (1, 2, 3, 7, 64, 1 << 16):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(list(iter_json_array(path, chunk_size=chunk_size)), items)
+
+    def test_empty_and_incomplete(self):
+        self.assertEqual(list(iter_json_array(self.write(' [ ] '), chunk_size=1)), [])
+        with self.assertRaises(ValueError):
+            list(iter_json_array(self.write('[1, 2, 3'), chunk_size=2))
+        with self.assertRaises(ValueError):
+            list(iter_json_array(self.write('{"a": 1}'), chunk_size=2))
+
+class TopKRankerTest(unittest.TestCase):
+    def test_ties_broken_by_asin(self):
+        ranker = TopKRanker(3)
+        for score, asin in [(8.0, 'B3'), (9.0, 'B9'), (8.0, 'B1'), (8.0, 'B2'), (7.0, 'B0')]:
+            ranker.push(score, asin, asin)
+        self.assertEqual(ranker.ranked(), ['B9', 'B1', 'B2'])
+        self.assertEqual((len(ranker), ranker.seen), (3, 5))
+
+    def test_extend_matches_full_sort(self):
+        products = [{'asin': f'B{i % 7}{i}', 'quantum_score': float(i % 4)} for i in range(40)]
+        ranker = TopKRanker(10)
+        ranker.extend(products)
+        expected = sorted(products, key=lambda p: (-p['quantum_score'], p['asin']))[:10]
+        self.assertEqual(ranker.ranked(), expected)
+
+class QuantumSchedulerTest(unittest.TestCase):
+    # Venerdì 16 ottobre 2026, 10:30
+    NOW = datetime(2026, 10, 16, 10, 30)
+
+    def test_next_due_helpers(self):
+        self.assertEqual(every(timedelta(minutes=15))(self.NOW), datetime(2026, 10, 16, 10, 45))
+        self.assertEqual(daily('09:00')(self.NOW), datetime(2026, 10, 17, 9, 0))
+        self.assertEqual(daily('11:00')(self.NOW), datetime(2026, 10, 16, 11, 0))
+        self.assertEqual(daily('10:30')(self.NOW), datetime(2026, 10, 17, 10, 30))
+        self.assertEqual(weekly(0, '09:00')(self.NOW), datetime(2026, 10, 19, 9, 0))
+        self.assertEqual(weekly(4, '11:00')(self.NOW), datetime(2026, 10, 16, 11, 0))
+        self.assertEqual(weekly(4, '09:00')(self.NOW), datetime(2026, 10, 23, 9, 0))
+        self.assertEqual(monthly(1, '09:00')(self.NOW), datetime(2026, 11, 1, 9, 0))
+        self.assertEqual(monthly(20, '09:00')(self.NOW), datetime(2026, 10, 20, 9, 0))
+        self.assertEqual(monthly(1, '09:00')(datetime(2026, 12, 5)), datetime(2027, 1, 1, 9, 0))
+
+    def test_run_pending_reschedules(self):
+        scheduler = QuantumScheduler()
+        calls = []
+        now_job = scheduler.add_job('now', lambda: calls.append('now'), every(timedelta(hours=1)),
+                                    run_immediately=True)
+        scheduler.add_job('later', lambda: calls.append('later'), every(timedelta(minutes=30)))
+        scheduler.add_job('broken', lambda: 1 / 0, every(timedelta(hours=2)), run_immediately=True)
+
+        self.assertEqual(scheduler.run_pending(), 2)
+        self.assertEqual(calls, ['now'])
+        self.assertEqual(now_job.runs, 1)
+        self.assertGreater(now_job.due_at, datetime.now() + timedelta(minutes=59))
+        self.assertEqual(scheduler.next_job().name, 'later')
+        self.assertEqual(scheduler.run_pending(), 0)
+
+class FakeCompletions:
+    """Client OpenAI finto: risposta fissa ai batch, score singolo alle richieste per prodotto"""
+
+    def __init__(self, batch_reply: str, single_reply: str = '0.4'):
+        self.batch_reply = batch_reply
+        self.single_reply = single_reply
+        self.requests = []
+
+    async def create(self, timeout=None, **params):
+        content = params['messages'][0]['content']
+        self.requests.append(content)
+        reply = self.batch_reply if 'array JSON' in content else self.single_reply
+        if isinstance(reply, Exception):
+            raise reply
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=reply))])
+
+class FeatureBatchTest(unittest.TestCase):
+    def make_analyzer(self, completions: FakeCompletions) -> QuantumAnalyzer:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        analyzer = QuantumAnalyzer(
+            openai_client=SimpleNamespace(chat=SimpleNamespace(completions=completions)),
+            ai_cache=QuantumCache(os.path.join(directory.name, 'ai_cache.db')),
+            ai_batch_size=3, ai_max_retries=0
+        )
+        self.addCleanup(analyzer.ai_cache.close)
+        return analyzer
+
+    @staticmethod
+    def products():
+        return [
+            Product(f'B00000000{i}', f'Prodotto {i}', 50.0, 4.5, 100, 'electronics', f'Descrizione {i}', ['Feature 0'])
+            for i in range(3)
+        ]
+
+    def score(self, batch_reply: str):
+        completions = FakeCompletions(batch_reply)
+        analyzer = self.make_analyzer(completions)
+        products = self.products()
+        scores = asyncio.run(analyzer.analyze_features_batch(products))
+        cached = [analyzer.ai_cache.get(analyzer._feature_cache_key(p)) for p in products]
+        return scores, cached, completions
+
+    def test_aligned_array(self):
+        scores, cached, completions = self.score('[0.9, 0.1, 0.5]')
+        self.assertEqual(scores, [0.9, 0.1, 0.5])
+        self.assertEqual(cached, scores)
+        self.assertEqual(len(completions.requests), 1)
+
+    def test_short_array_falls_back_for_whole_batch(self):
+        scores, cached, completions = self.score('[0.9, 0.1]')
+        self.assertEqual(scores, [0.4, 0.4, 0.4])
+        self.assertEqual(cached, [0.4, 0.4, 0.4])
+        self.assertEqual(len(completions.requests), 4)
+
+    def test_long_array_falls_back_for_whole_batch(self):
+        scores, cached, completions = self.score('[0.9, 0.1, 0.5, 0.7]')
+        self.assertEqual(scores, [0.4, 0.4, 0.4])
+        self.assertEqual(cached, [0.4, 0.4, 0.4])
+        self.assertEqual(len(completions.requests), 4)
+
+    def test_failed_request_is_recorded_without_fan_out(self):
+        completions = FakeCompletions(RuntimeError('rate limited'))
+        analyzer = self.make_analyzer(completions)
+        scores = asyncio.run(analyzer.analyze_features_batch(self.products()))
+        self.assertEqual(scores, [0.5, 0.5, 0.5])
+        self.assertEqual(len(completions.requests), 1)
+        self.assertEqual([(b['batch_size'], b['parsed'], b['error']) for b in analyzer.batch_stats], [(3, 0, True)])
+
+    def test_latency_excludes_semaphore_wait(self):
+        analyzer = self.make_analyzer(FakeCompletions('[0.9, 0.1, 0.5]'))
+
+        async def run():
+            semaphore = analyzer._get_global_semaphore()
+            for _ in range(analyzer.max_concurrent_total):
+                await semaphore.acquire()
+            scoring = asyncio.ensure_future(analyzer.analyze_features_batch(self.products()))
+            await asyncio.sleep(0.3)
+            semaphore.release()
+            return await scoring
+
+        self.assertEqual(asyncio.run(run()), [0.9, 0.1, 0.5])
+        self.assertLess(analyzer.batch_stats[0]['latency'], 0.1)
+        self.assertFalse(analyzer.batch_stats[0]['error'])
+
+class FakeSMTPPool:
+    """Pool SMTP finto: registra i destinatari o solleva sempre lo stesso errore"""
+
+    def __init__(self, error: Exception = None):
+        self.error = error
+        self.recipients = []
+        self.stats = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def sendmail(self, from_addr, to_addrs, data):
+        if self.error is not None:
+            raise self.error
+        self.recipients.extend(to_addrs)
+
+class CampaignResumeTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(directory.name)
+        self.automation = EmailAutomation()
+        self.automation.campaign_journal_path = os.path.join(directory.name, 'journal.db')
+        self.automation.send_rate = 1000
+        self.subscribers = [{'email': f'user{i}@example.com'} for i in range(20)]
+
+    def deliver(self, pool: FakeSMTPPool):
+        self.automation.create_smtp_pool = lambda: pool
+        return asyncio.run(self.automation.deliver_campaign(
+            iter(self.subscribers), 'Newsletter', '<p>Top prodotti</p>', campaign_id='newsletter-test'
+        ))
+
+    def journal_stats(self):
+        journal = CampaignJournal(self.automation.campaign_journal_path)
+        try:
+            return journal.get_stats('newsletter-test'), journal.start('newsletter-test')
+        finally:
+            journal.close()
+
+    def test_session_errors_abort_without_failing_recipients(self):
+        for error in (
+            smtplib.SMTPAuthenticationError(535, b'bad credentials'),
+            smtplib.SMTPSenderRefused(553, b'sender not allowed', 'news@quantumchoices.it'),
+            smtplib.SMTPConnectError(554, b'no service'),
+        ):
+            with self.subTest(error=type(error).__name__):
+                self.assertIsNone(self.deliver(FakeSMTPPool(error)))
+                stats, open_campaign = self.journal_stats()
+                self.assertEqual(stats, {})
+                self.assertTrue(open_campaign)
+
+        # Credenziali corrette: il rilancio consegna a tutti e chiude la campagna
+        pool = FakeSMTPPool()
+        report = self.deliver(pool)
+        self.assertEqual(report['sent'], 20)
+        self.assertEqual(sorted(pool.recipients), sorted(s['email'] for s in self.subscribers))
+        stats, open_campaign = self.journal_stats()
+        self.assertEqual(stats, {'sent': 20})
+        self.assertFalse(open_campaign)
+        self.assertIsNone(self.deliver(FakeSMTPPool()))
+
+    def test_recipient_rejections_are_final(self):
+        pool = FakeSMTPPool(smtplib.SMTPRecipientsRefused({'x': (550, b'no such user')}))
+        self.assertEqual(self.deliver(pool)['failed'], 20)
+        stats, open_campaign = self.journal_stats()
+        self.assertEqual(stats, {'failed': 20})
+        self.assertFalse(open_campaign)
+
+class PriceHistoryTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def test_same_asin_in_two_categories(self):
+        # Stesso ASIN in due categorie a prezzi diversi: nessun confronto incrociato
+        keys = [product_key('electronics', 'B000000015'), product_key('home', 'B000000015')]
+        history = PriceHistory(self.directory)
+        self.assertEqual(len(history.update(keys, [50.0, 100.0], snapshot='day-1')['index']), 0)
+
+        history = PriceHistory(self.directory)
+        self.assertEqual(len(history.update(keys, [50.0, 100.0], snapshot='day-2')['index']), 0)
+
+        drops = PriceHistory(self.directory).update(keys, [40.0, 100.0], snapshot='day-3')
+        self.assertEqual(list(drops['index']), [0])
+        self.assertAlmostEqual(float(drops['previous_price'][0]), 50.0)
+        self.assertAlmostEqual(float(drops['drop_pct'][0]), 20.0)
+        self.assertEqual(list(PriceHistory(self.directory).history(keys[0])['price']), [50.0, 40.0])
+
+    def test_duplicate_keys_in_snapshot_keep_first_price(self):
+        key = product_key('electronics', 'B000000001')
+        history = PriceHistory(self.directory)
+        history.update([key, key], [50.0, 100.0], snapshot='day-1')
+        self.assertEqual(list(history.history(key)['price']), [50.0])
+
+        drops = PriceHistory(self.directory).update([key], [50.0], snapshot='day-2')
+        self.assertEqual(len(drops['index']), 0)
+
+class ResourceSamplerTest(unittest.TestCase):
+    def test_start_does_not_block_and_primes_on_sampler_thread(self):
+        sampler = ResourceSampler(interval=5.0)
+        start_time = time.perf_counter()
+        sampler.start()
+        self.addCleanup(sampler.stop)
+        self.assertLess(time.perf_counter() - start_time, PRIME_DELAY / 2)
+        self.assertIsNone(sampler.aggregate())
+
+        deadline = time.monotonic() + 5
+        while sampler.aggregate() is None and time.monotonic() < deadline:
+            time.sleep(0.02)
+        aggregate = sampler.aggregate()
+        self.assertEqual(aggregate['samples'], 1)
+        self.assertGreaterEqual(aggregate['cpu_usage']['latest'], 0.0)
+
+    def test_stop_during_priming(self):
+        sampler = ResourceSampler(interval=5.0)
+        sampler.start()
+        sampler.stop()
+        self.assertIsNone(sampler.aggregate())
+
+class IncrementalScoringTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache = QuantumCache(os.path.join(directory.name, 'ai_cache.db'))
+        self.addCleanup(self.cache.close)
+
+    def analyzer(self, incremental: bool) -> QuantumAnalyzer:
+        return QuantumAnalyzer(openai_client=SimpleNamespace(), ai_cache=self.cache, incremental=incremental)
+
+    @staticmethod
+    def product(asin: str, **changes) -> Product:
+        fields = dict(asin=asin, title=f'Prodotto {asin}', price=99.0, rating=4.5, review_count=200,
+                      category='electronics', description='Descrizione', features=['Feature 0'])
+        fields.update(changes)
+        return Product(**fields)
+
+    def test_reuses_only_components_with_unchanged_inputs(self):
+        analyzer = self.analyzer(incremental=True)
+        before = [self.product(f'B{i}') for i in range(5)]
+        previous_state = {
+            p.asin: {
+                'fingerprints': analyzer.fingerprint_product(p),
+                'components': {'feature': 0.1 * (i + 1), 'sentiment': 0.5 + 0.1 * i}
+            }
+            for i, p in enumerate(before)
+        }
+
+        after = [
+            self.product('B0'),                                         # invariato
+            self.product('B1', price=79.0),                             # solo prezzo
+            self.product('B2', features=['Feature 0', 'Feature 1']),    # solo features
+            self.product('B3', rating=4.0),                             # solo metriche
+            self.product('B4', price=79.0, rating=4.0, title='Nuovo'),  # tutto cambiato
+            self.product('B5'),                                         # nuovo prodotto
+        ]
+        fingerprints = [analyzer.fingerprint_product(p) for p in after]
+        features, sentiments, counts = analyzer.plan_incremental_scoring(after, fingerprints, previous_state)
+
+        self.assertEqual(features, [0.1, 0.2, None, 0.4, None, None])
+        self.assertEqual(sentiments, [0.5, 0.6, 0.7, None, None, None])
+        self.assertEqual(counts, {'skipped': 1, 'partial': 3, 'full': 2})
+
+    def test_full_rescoring_when_not_incremental(self):
+        analyzer = self.analyzer(incremental=False)
+        product = self.product('B0')
+        fingerprint = analyzer.fingerprint_product(product)
+        previous_state = {'B0': {'fingerprints': fingerprint, 'components': {'feature': 0.3, 'sentiment': 0.6}}}
+
+        features, sentiments, counts = analyzer.plan_incremental_scoring([product], [fingerprint], previous_state)
+        self.assertEqual((features, sentiments), ([None], [None]))
+        self.assertEqual(counts, {'skipped': 0, 'partial': 0, 'full': 1})
+
+class QuantumCacheTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'ai_cache.db')
+        self.now = 1000.0
+        # Orologio finto solo per il modulo della cache
+        patcher = mock.patch('quantum_cache.time', SimpleNamespace(time=lambda: self.now))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def open(self, **options) -> QuantumCache:
+        cache = QuantumCache(self.path, **options)
+        self.addCleanup(cache._db.close)
+        return cache
+
+    def test_ttl_in_memory_and_on_disk(self):
+        cache = self.open(ttl_seconds=60)
+        cache.set('k', {'score': 0.7})
+        self.now = 1030.0
+        self.assertEqual(cache.get('k'), {'score': 0.7})
+        cache.close()
+
+        reopened = self.open(ttl_seconds=60)
+        self.assertEqual(reopened.get('k'), {'score': 0.7})
+        self.assertEqual(reopened.stats['disk_hits'], 1)
+        self.now = 1061.0
+        self.assertIsNone(reopened.get('k'))
+        self.assertIsNone(self.open(ttl_seconds=60).get('k'))
+
+    def test_lru_eviction_sees_batched_disk_hits(self):
+        cache = self.open(max_entries=3)
+        for key in ('a', 'b', 'c'):
+            self.now += 1
+            cache.set(key, key)
+        cache.close()
+
+        # Hit su disco di 'a' ancora in sospeso: prune lo scrive prima di scegliere chi eliminare
+        cache = self.open(max_entries=3, memory_entries=1, access_flush_every=100)
+        self.now = 1010.0
+        self.assertEqual(cache.get('a'), 'a')
+        self.now = 1011.0
+        cache.set('d', 'd')
+        cache.prune()
+
+        self.assertEqual(cache.stats['evictions'], 1)
+        keys = {key for (key,) in cache._db.execute("SELECT key FROM cache")}
+        self.assertEqual(keys, {'a', 'c', 'd'})
+
+    def test_access_times_flushed_in_batches_and_on_close(self):
+        cache = self.open(access_flush_every=2)
+        for key in ('a', 'b', 'c'):
+            cache.set(key, key)
+        cache.close()
+
+        def last_access(cache, key):
+            return cache._db.execute("SELECT last_access FROM cache WHERE key = ?", (key,)).fetchone()[0]
+
+        cache = self.open(memory_entries=1, access_flush_every=2)
+        self.now = 2000.0
+        cache.get('a')
+        self.assertEqual(last_access(cache, 'a'), 1000.0)
+        cache.get('b')
+        self.assertEqual((last_access(cache, 'a'), last_access(cache, 'b')), (2000.0, 2000.0))
+        cache.get('c')
+        cache.close()
+        self.assertEqual(last_access(self.open(), 'c'), 2000.0)
+
+class MetricsStoreRestartTest(unittest.TestCase):
+    # Inizio di un giorno UTC: minuto, ora e giorno aperti insieme
+    START = 1_790_035_200.0
+
+    def test_open_buckets_restored_after_restart(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        store = MetricsStore(directory.name)
+        for offset, value in ((0, 10.0), (10, 20.0), (20, 30.0)):
+            store.record(self.START + offset, {'cpu_usage': value})
+
+        # Riavvio: i campioni del minuto/ora ancora aperti vanno ricaricati dal segmento raw
+        store = MetricsStore(directory.name)
+        raw = store.query('cpu_usage', self.START, self.START + 60)
+        self.assertEqual(list(raw['value']), [10.0, 20.0, 30.0])
+
+        store.record(self.START + 30, {'cpu_usage': 40.0})
+        store.record(self.START + 60, {'cpu_usage': 50.0})      # chiude il minuto
+        store.record(self.START + 3600, {'cpu_usage': 60.0})    # chiude l'ora
+
+        minutes = store.query('cpu_usage', self.START, self.START + 3600, resolution='1m')
+        self.assertEqual([(m['timestamp'], m['count']) for m in minutes],
+                         [(self.START, 4), (self.START + 60, 1)])
+        self.assertEqual((minutes[0]['min'], minutes[0]['max'], minutes[0]['avg']), (10.0, 40.0, 25.0))
+
+        hours = store.query('cpu_usage', self.START, self.START + 7200, resolution='1h')
+        self.assertEqual([(h['timestamp'], h['count'], h['avg']) for h in hours], [(self.START, 5, 30.0)])
+
+if __name__ == '__main__':
+    unittest.main()